@@ -5,13 +5,16 @@
 
 import datetime as dt
 import logging
+import warnings
 
 import numpy as np
 import pandas as pd
 import xarray as xr
 
 from .filters import Filtering
+from .io import open_sweep
 from .lidar_code import GetLidarData
+from .utilities import nearest_index
 
 module_logger = logging.getLogger("lidarwind.data_operator")
 module_logger.debug("loading data_operator")
@@ -31,6 +34,42 @@ def wc_fixed_preprocessing(ds: xr.Dataset, azimuth_resolution: int = 1):
     return ds.expand_dims("elevation").set_coords("elevation")
 
 
+def concat_along_time(ds_list):
+    """Time concatenation
+
+    It concatenates a list of datasets along time in a single
+    step, instead of merging them one by one, and sorts the
+    result by time. Variables without the time dimension are
+    taken from the first dataset.
+
+    Parameters
+    ----------
+    ds_list : list
+        a list of datasets sharing the time dimension
+
+    Returns
+    -------
+    xarray.DataSet
+        the concatenated dataset, or an empty dataset
+        if the list is empty
+
+    """
+
+    if not ds_list:
+        return xr.Dataset()
+
+    tmp_ds = xr.concat(
+        ds_list,
+        dim="time",
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        join="outer",
+    )
+
+    return tmp_ds.sortby("time")
+
+
 class DataOperations:
 
     """Basic data manager
@@ -48,11 +87,28 @@ class DataOperations:
     >>> merged_ds = lidarwind.DataOperations(file_list).merged_data
     >>> merged_ds.to_netcdf(output_file_path)
 
+    For long periods, the lazy mode keeps the data as dask arrays
+    and combines all files in a single step at the end:
+
+    >>> merged_ds = lidarwind.DataOperations(file_list, lazy=True).merged_data
+    >>> merged_ds.to_netcdf(output_file_path)
+
     Parameters
     ----------
     data_paths : list
        List of paths of the original WindCube's output.
 
+    lazy : bool, optional
+        If True, the files are opened as dask arrays and the
+        vertical and slanted observations are concatenated only
+        once, after all files were read. The merged data has the
+        same content as in the default mode, but is not loaded
+        into memory.
+
+    chunks : int, dict, optional
+        Chunk sizes used in the lazy mode (see xarray.Dataset.chunk).
+        By default, each file is a single chunk.
+
     Returns
     -------
     object : object
@@ -61,7 +117,7 @@ class DataOperations:
 
     """
 
-    def __init__(self, data_paths, verbose=False):
+    def __init__(self, data_paths, verbose=False, lazy=False, chunks=None):
 
         self.logger = logging.getLogger(
             "lidarwind.data_operator.DataOperations"
@@ -76,10 +132,16 @@ class DataOperations:
 
         self.verbose = verbose
         self.data_paths = data_paths
+        # one chunk per file by default
+        self.chunks = {} if chunks is None else chunks
         self.tmp90 = xr.Dataset()
         self.tmp_non_90 = xr.Dataset()
 
-        self.elevation_filter()
+        if lazy:
+            self.elevation_filter_lazy()
+        else:
+            self.elevation_filter()
+
         self.rename_var_90()
         self.get_merge_data()
 
@@ -128,6 +190,70 @@ class DataOperations:
 
         return self
 
+    def elevation_filter_lazy(self):
+        """
+        It groups the data from the vertical and slanted observations
+        and rounds the azimuth coordinate, keeping the data as dask
+        arrays. The files are concatenated along time only once.
+        """
+
+        self.logger.info("coverting azimuth: from 360 to 0 degrees (lazy)")
+
+        list90 = []
+        list_non_90 = []
+
+        for file_path in self.data_paths:
+
+            try:
+                tmp_file = open_sweep(file_path).chunk(self.chunks)
+                self.logger.debug(f"reading file: {file_path}")
+            except (AssertionError, KeyError, OSError, ValueError) as err:
+                self.logger.warning(
+                    f"Skipping file, it has a problem: {file_path} ({err})"
+                )
+                continue
+
+            try:
+                # elevation is small and needed to select the data
+                elevation = tmp_file["elevation"].round(1).compute()
+                tmp_file["elevation"] = elevation
+                tmp_file["azimuth"] = tmp_file["azimuth"].round(1)
+                tmp_file["azimuth"] = tmp_file["azimuth"].where(
+                    tmp_file["azimuth"] != 360, 0
+                )
+            except (KeyError, OSError, ValueError) as err:
+                self.logger.warning(
+                    f"Skipping file, problems reading elv and azm: "
+                    f"{file_path} ({err})"
+                )
+                continue
+
+            list90.append(tmp_file.where(elevation == 90, drop=True))
+            list_non_90.append(tmp_file.where(elevation != 90, drop=True))
+
+        self.tmp90 = self.concat_files(list90)
+        self.tmp_non_90 = self.concat_files(list_non_90)
+
+        return self
+
+    def concat_files(self, ds_list):
+        """
+        It concatenates a list of datasets along time in
+        a single step, sorting the result by time. The small
+        time-only variables (e.g. elevation and azimuth) are
+        loaded, since they are used to select the data later.
+        """
+
+        self.logger.info(f"concatenating {len(ds_list)} files")
+
+        tmp_ds = concat_along_time(ds_list)
+
+        for var in tmp_ds.data_vars:
+            if tmp_ds[var].dims == ("time",):
+                tmp_ds[var] = tmp_ds[var].compute()
+
+        return tmp_ds
+
     def rename_var_90(self):
         """
         It renames the vertical coordinate
@@ -331,6 +457,7 @@ class GetRestructuredData:
         self.center = center
         self.min_periods = min_periods
         self.n_std = n_std
+        self.filtering = Filtering(self.data)
 
         self.vertical_component_check(check90)
         self.get_coord_non_90()
@@ -368,26 +495,48 @@ class GetRestructuredData:
 
         self.logger.info("creating a DataArray of the slanted observations")
 
-        dop_wind_arr = np.empty(
+        # quality mask applied once for all beams
+        rad_wind_speed = self.data.radial_wind_speed
+        mask = self.filtering.get_quality_mask(
+            snr=self.snr, status=self.status
+        )
+
+        if mask is not None:
+            rad_wind_speed = rad_wind_speed.where(mask)
+
+        rad_wind_speed = rad_wind_speed.transpose("time", "range").values
+
+        time = self.data.time.values
+        elevation = self.data.elevation.values
+        azimuth = self.data.azimuth.values
+
+        # integer beam codes of the slanted rays
+        slanted = np.flatnonzero(elevation != 90)
+        slanted = slanted[np.argsort(time[slanted], kind="stable")]
+        azm_code = np.searchsorted(self.azm_non_90, azimuth[slanted])
+        elv_code = np.searchsorted(self.elv_non_90, elevation[slanted])
+
+        dop_wind_arr = np.full(
             (
                 self.time_non_90.shape[0],
                 self.range_non_90.shape[0],
                 len(self.azm_non_90),
                 len(self.elv_non_90),
-            )
+            ),
+            np.nan,
         )
 
-        for j, elv in enumerate(self.elv_non_90):
+        for j in range(len(self.elv_non_90)):
 
-            for i, azm in enumerate(self.azm_non_90):
+            for i in range(len(self.azm_non_90)):
 
-                tmp_rad_wind = Filtering(self.data).get_radial_obs_comp(
-                    "radial_wind_speed", azm, snr=self.snr, status=self.status
-                )
+                beam = slanted[(azm_code == i) & (elv_code == j)]
+
+                if beam.size == 0:
+                    continue
 
-                dop_wind_arr[:, :, i, j] = tmp_rad_wind.sel(
-                    time=self.time_non_90, method="Nearest"
-                ).values
+                nearest = nearest_index(time[beam], self.time_non_90.values)
+                dop_wind_arr[:, :, i, j] = rad_wind_speed[beam[nearest]]
 
         new_range = self.data.range90.values[: len(self.data.range)]
         resampled_dop_vel = xr.DataArray(
@@ -419,17 +568,14 @@ class GetRestructuredData:
 
         self.logger.info("selcting zenith observations")
 
-        tmp_data = Filtering(self.data).get_vertical_obs_comp(
-            "radial_wind_speed90", snr=self.snr, status=self.status
+        tmp_data = self.filtering.extract(
+            ["radial_wind_speed90", "relative_beta90"],
+            snr=self.snr,
+            status=self.status,
         )
         tmp_data = tmp_data.isel(range90=slice(0, len(self.range_non_90)))
-        self.data_transf_90 = tmp_data
-
-        tmp_data = Filtering(self.data).get_vertical_obs_comp(
-            "relative_beta90", snr=self.snr, status=self.status
-        )
-        tmp_data = tmp_data.isel(range90=slice(0, len(self.range_non_90)))
-        self.relative_beta90 = tmp_data
+        self.data_transf_90 = tmp_data["radial_wind_speed90"]
+        self.relative_beta90 = tmp_data["relative_beta90"]
 
         return self
 
@@ -442,6 +588,12 @@ class GetRestructuredData:
             print("Vertical component check was ignored.")
 
 
+def _seconds(time):
+    """It converts datetimes of any resolution into float seconds"""
+
+    return np.asarray(time, dtype="datetime64[ns]").astype(float) * 10 ** (-9)
+
+
 class GetResampledData:
     """Alternative basic data resample
 
@@ -451,13 +603,21 @@ class GetResampledData:
     It mainly used internal processings of
     the package.
 
+    If a dataset is given, the nearest time indexes are
+    calculated only once and applied to all variables
+    that depend on the time coordinate.
+
+    Examples
+    --------
+    >>> resampled = lidarwind.GetResampledData(ds[var_list]).resampled
+
     Parameters
     -----------
-    xr_data_array : xr.DataArray
-        varaiable that will be resampled
+    xr_data_array : xr.DataArray, xr.Dataset
+        varaiable (or dataset of variables) that will be resampled
 
     vert_coord : str
-        name of the vertical coordinate
+        name of the vertical coordinate (only used for xr.DataArray)
 
     time_freq : str
         size of the window e.g.: '15s'
@@ -470,15 +630,15 @@ class GetResampledData:
 
     Returns
     -------
-    data : xr.DataArray
+    data : xr.DataArray, xr.Dataset
 
-        time resampled variable
+        time resampled variable (or dataset)
 
     """
 
     def __init__(
         self,
-        xr_data_array: xr.DataArray,
+        xr_data_array,
         vert_coord="range",
         time_freq="15s",
         tolerance=10,
@@ -490,30 +650,39 @@ class GetResampledData:
         )
         self.logger.info("creating an instance of GetResampledData")
 
-        if not isinstance(xr_data_array, xr.DataArray):
-            self.logger.error("wrong data type: expecting a xr.DataArray")
+        if not isinstance(xr_data_array, (xr.DataArray, xr.Dataset)):
+            self.logger.error(
+                "wrong data type: expecting a xr.DataArray or xr.Dataset"
+            )
             raise TypeError
 
-        self.var_name = xr_data_array.name
+        self.var_name = getattr(xr_data_array, "name", None)
         self.attrs = xr_data_array.attrs
         data = xr_data_array
         date = pd.to_datetime(data[time_coord].values[0])
 
         self.time_ref = self.get_time_ref(date, time_freq)
-        self.vert_coord = data[vert_coord]
 
-        time_ref_sec = np.array(self.time_ref, float) * 10 ** (-9)
-        time_orig_sec = np.array(data[time_coord].values, float) * 10 ** (-9)
+        # both grids in ns, pandas may create the reference in us
+        time_ref_sec = _seconds(self.time_ref)
+        time_orig_sec = _seconds(data[time_coord].values)
 
-        delta_grid = self.calc_delt_grid(time_ref_sec, time_orig_sec)
-        time_index_array = self.get_nearest_index_method_2(
-            delta_grid, tolerance
+        time_index_array = self.get_nearest_index(
+            time_ref_sec, time_orig_sec, tolerance
         )
+        self.time_index_array = time_index_array
 
-        self.values = self.time_resample(
-            data, time_index_array, self.vert_coord
-        )
-        self.resampled = self.convert_to_data_array()
+        if isinstance(data, xr.Dataset):
+            self.resampled = self.dataset_resample(
+                data, time_index_array, time_coord
+            )
+
+        else:
+            self.vert_coord = data[vert_coord]
+            self.values = self.time_resample(
+                data, time_index_array, self.vert_coord
+            )
+            self.resampled = self.convert_to_data_array()
 
     def get_time_ref(self, date, time_freq="1s"):
         """
@@ -545,45 +714,22 @@ class GetResampledData:
 
         return time_ref
 
-    def calc_delt_grid(self, ref_grid, orig_grid):
+    def get_nearest_index(self, ref_grid, orig_grid, tolerance):
         """
-        Calculates the distance between the reference grid
-        and the radar grid (time or range)
+        Identify the index of the nearest element from the original
+        grid for each element from the reference grid, if it fulfils
+        the resampling tolerance. It uses a binary search over the
+        sorted original grid, so no (reference x original) matrix
+        is created. When two elements are equally distant, the
+        earlier one is selected.
 
         Parameters
         ----------
         ref_grid : numpy.array
             reference grid (array[n])
 
-        radarGrid : numpy.array
-            radar grid (array[m])
-
-        Returns
-        -------
-        delta_grid : numpy.array
-
-            distance between each element from
-            the reference grid to each element from the
-            radar grid
-        """
-
-        self.logger.info("calculating the distance to the reference")
-
-        tmp_grid_2_d = np.ones((len(ref_grid), len(orig_grid))) * orig_grid
-
-        delta_grid = tmp_grid_2_d - np.reshape(ref_grid, (len(ref_grid), 1))
-
-        return delta_grid
-
-    def get_nearest_index_method_2(self, delta_grid, tolerance):
-        """
-        Identify the index of the delta_grid that fulfil
-        the resampling tolerance
-
-        Parameters
-        ----------
-        delta_grid : numpy.array
-            output from calcRadarDeltaGrid
+        orig_grid : numpy.array
+            original grid (array[m])
 
         tolerance : int
             tolerance distance for detecting
@@ -594,61 +740,105 @@ class GetResampledData:
         grid_index : np.array
 
             array of indexes that fulfil the resampling
-            tolerance
+            tolerance (NaN if there is no neighbour)
 
         """
 
         self.logger.info("identifying index that fulfil the tolerance")
 
-        grid_index = np.argmin(abs(delta_grid), axis=1)
-        delta_grid_min = np.min(abs(delta_grid), axis=1)
-        grid_index = np.array(grid_index, float)
-        grid_index[delta_grid_min > tolerance] = np.nan
+        orig_grid = np.asarray(orig_grid)
+        sort_index = np.argsort(orig_grid, kind="stable")
+
+        sorted_index = nearest_index(
+            orig_grid[sort_index], ref_grid, tolerance=tolerance, tie="earlier"
+        )
+
+        grid_index = np.full(sorted_index.shape, np.nan)
+        valid = sorted_index >= 0
+        grid_index[valid] = sort_index[sorted_index[valid]]
 
         return grid_index
 
     def time_resample(self, data, time_index_array, vert_coord):
         """
         It resamples a given radar variable using the
-        time and range index calculated by get_nearest_index_method_2
+        time index calculated by get_nearest_index, i.e. the
+        nearest original time found with a binary search.
 
         Parameters
         ----------
-        var : str
-            radar variable name to be resampled
-
-        xrDataset : xarray.dataset
-            xarray dataset containing the variables to
-            be resampled
+        data : xarray.DataArray
+            variable to be resampled
 
-        timeIdexArray : np.array
-            time resampling index (output from get_nearest_index_method_2)
+        time_index_array : np.array
+            time resampling index (output from get_nearest_index),
+            NaN where no original time is within the tolerance
 
-        rangeIndexArray : np.array
-            range resampling index (output from get_nearest_index_method_2)
+        vert_coord : xarray.DataArray
+            vertical coordinate of the variable
 
         Returns
         -------
-        resampledArr : xarray.dataArray
-            time/range resampled numpy array
+        resampled_time_arr : numpy.array
+            time resampled numpy array
         """
 
         self.logger.info(f"time resampling of: {self.var_name}")
 
-        resampled_time_arr = (
-            np.ones((time_index_array.shape[0], self.vert_coord.shape[0]))
-            * np.nan
+        resampled_time_arr = np.full(
+            (time_index_array.shape[0], vert_coord.shape[0]), np.nan
         )
 
-        for position, time_index in enumerate(time_index_array):
+        valid = np.isfinite(time_index_array)
+        resampled_time_arr[valid] = data.values[
+            time_index_array[valid].astype(int)
+        ]
 
-            try:
-                resampled_time_arr[position] = data.values[int(time_index)]
+        return resampled_time_arr
 
-            except:
-                pass
+    def dataset_resample(self, data, time_index_array, time_coord):
+        """
+        It resamples all variables from a dataset that depend on
+        the time coordinate, using the same time index for all
+        of them.
 
-        return resampled_time_arr
+        Parameters
+        ----------
+        data : xarray.Dataset
+            dataset containing the variables to be resampled
+
+        time_index_array : np.array
+            time resampling index (output from get_nearest_index)
+
+        time_coord : str
+            name of the time coordinate
+
+        Returns
+        -------
+        resampled : xarray.Dataset
+            time resampled dataset
+        """
+
+        var_names = [
+            var for var in data.data_vars if time_coord in data[var].dims
+        ]
+
+        self.logger.info(f"time resampling of: {var_names}")
+
+        valid = np.isfinite(time_index_array)
+        time_index = xr.DataArray(
+            np.where(valid, time_index_array, 0).astype(int),
+            dims="time_ref",
+            coords={"time_ref": self.time_ref},
+        )
+
+        resampled = data[var_names].isel({time_coord: time_index})
+        resampled = resampled.drop_vars(time_coord)
+        resampled = resampled.where(
+            xr.DataArray(valid, dims="time_ref", coords=time_index.coords)
+        )
+
+        return resampled
 
     def convert_to_data_array(self):
         """
@@ -712,7 +902,8 @@ class DbsOperations:
 
     def merge_data(self, file_list, var_list):
         """
-        This method merges all files from a list of DBS files
+        This method merges all files from a list of DBS files.
+        A file missing any of the variables is skipped entirely.
 
         Parameters
         ----------
@@ -738,6 +929,8 @@ class DbsOperations:
             )
             raise KeyError
 
+        files_to_merge = []
+
         for file in file_list:
 
             try:
@@ -748,69 +941,119 @@ class DbsOperations:
                 raise
 
             file_to_merge = self.mean_time_derivation(file_to_merge)
-            # file_to_merge = self.add_mean_time(file_to_merge)
 
             try:
-                self.merge_2_ds(file_to_merge, var_list)
-            except:
+                files_to_merge.append(
+                    self.select_variables(file_to_merge, var_list)
+                )
+            except KeyError:
                 self.logger.warning(f"Merging not possible: {file}")
-                # raise
 
-    def add_mean_time(self, lidar_ds):
+        self.logger.info(f"concatenating {len(files_to_merge)} DBS files")
+
+        self.merged_ds = concat_along_time(files_to_merge)
+
+    def select_variables(self, file_to_merge, var_list):
         """
-        This method adds the mean time to each file from
-        the DBS scan strategy.
+        This method extracts the variables to be merged
+        from a single DBS file.
 
         Parameters
         ----------
-        lidar_ds : xarray.DataSet
-            a dataset from a sequence of scans
+        file_to_merge : xarray.DataSet
+            a single file dataset
+
+        var_list : list
+            a list of variables to be extracted
+
+        Returns
+        -------
+        xarray.DataSet
+            the selected variables and the scan_mean_time
 
         """
 
-        self.logger.info("calculating the mean DBS time for each file")
+        return file_to_merge[list(var_list) + ["scan_mean_time"]]
 
-        mean_time_ns = np.array(lidar_ds.time.values, np.float64).mean()
-        mean_time = pd.to_datetime(
-            np.ones(len(lidar_ds.time.values)) * mean_time_ns
+    def add_mean_time(self, lidar_ds):
+        """
+        This method adds the mean time of all rays of a
+        dataset as the scan_mean_time.
+
+        Note
+        ----
+        Deprecated, mean_time_derivation adds the mean
+        time of each scan.
+        """
+        warnings.warn(
+            "DbsOperations.add_mean_time will be removed eventually. "
+            "Please use DbsOperations.mean_time_derivation instead",
+            DeprecationWarning,
+            stacklevel=2,
         )
-        mean_time_da = xr.DataArray(
-            data=mean_time,
+
+        mean_time = (
+            lidar_ds.time.values.astype("datetime64[ns]")
+            .astype(np.float64)
+            .mean()
+        )
+
+        lidar_ds["scan_mean_time"] = xr.DataArray(
+            np.full(lidar_ds.time.size, mean_time).astype("datetime64[ns]"),
             dims=("time"),
             coords={"time": lidar_ds.time},
-            name="scan_mean_time",
         )
 
-        lidar_ds = lidar_ds.merge(mean_time_da)
-
         return lidar_ds
 
     def merge_2_ds(self, file_to_merge, var_list):
         """
         This method merges the variables extracted from
-        the single DBS file with the storage dataset (merged_ds).
+        a single DBS file with the storage dataset (merged_ds).
 
-        Parameters
-        ----------
-        file_to_merge : xarray.DataSet
-            a single file dataset
+        Note
+        ----
+        Deprecated, merge_data selects the variables of each
+        file with select_variables and concatenates all files
+        in a single step.
+        """
+        warnings.warn(
+            "DbsOperations.merge_2_ds will be removed eventually. "
+            "Please use DbsOperations.select_variables instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
 
-        var_list : list
-            a list of variables to be merged
+        for var in list(var_list) + ["scan_mean_time"]:
+            self.merged_ds = xr.merge([self.merged_ds, file_to_merge[var]])
+
+        return self
 
+    def mean_time_derivation(self, data):
         """
+        This method identifies the complete scans from a DBS file
+        and adds the mean time of each scan (scan_mean_time).
 
-        self.logger.info("merging single DBS file")
+        A new scan starts at every slanted ray pointing to the
+        azimuth of the first ray. The scan of each ray is found
+        with a single search over these markers and the mean times
+        are derived with one grouped sum, instead of splitting the
+        dataset in groups.
 
-        for var in var_list:
+        Parameters
+        ----------
+        data : xarray.DataSet
+            a dataset from a sequence of scans
 
-            self.merged_ds = xr.merge([self.merged_ds, file_to_merge[var]])
+        Returns
+        -------
+        xarray.DataSet
+            the rays belonging to complete scans, including the
+            scan_mean_time variable
 
-        self.merged_ds = xr.merge(
-            [self.merged_ds, file_to_merge["scan_mean_time"]]
-        )
+        """
 
-    def mean_time_derivation(self, data):
+        self.logger.info("calculating the mean DBS time for each scan")
 
         data.azimuth.values = np.round(data.azimuth.values)
         data.azimuth.values[data.azimuth.values == 360] = 0
@@ -818,25 +1061,39 @@ class DbsOperations:
         data.elevation.values = np.round(data.elevation.values, 1)
 
         azm_ref = data.azimuth.values[0]
-        index_new_scan = data.ray_index.where(
-            (data.elevation != 90) & (data.azimuth == azm_ref)
+        new_scan = (data.elevation.values != 90) & (
+            data.azimuth.values == azm_ref
         )
-        index_complete_scans = index_new_scan.values[
-            np.isfinite(index_new_scan.values)
-        ]
+        ray_index = data.ray_index.values
+        index_complete_scans = ray_index[new_scan]
 
         if not len(data.time) in index_complete_scans:
             index_complete_scans = np.append(
                 index_complete_scans, len(data.time)
             )
 
-        groups = data.groupby_bins(
-            "ray_index", index_complete_scans, right=False
-        )
+        # scan number of each ray, equivalent to the bins [start, end)
+        scan_id = np.searchsorted(index_complete_scans, ray_index, "right") - 1
+        complete = (scan_id >= 0) & (scan_id < len(index_complete_scans) - 1)
+        scan_id = scan_id[complete]
+
+        # mean time relative to the first ray avoids precision losses
+        time_ns = data.time.values.astype("datetime64[ns]").astype(np.int64)
+        time_offset = time_ns[complete] - time_ns[0]
 
-        new_data = xr.Dataset()
-        for grp in groups.groups:
+        scan_counts = np.bincount(scan_id)
+        scan_sums = np.bincount(scan_id, weights=time_offset)
+        scan_mean_offset = scan_sums / np.maximum(scan_counts, 1)
 
-            new_data = xr.merge([new_data, self.add_mean_time(groups[grp])])
+        mean_time = time_ns[0] + np.round(scan_mean_offset[scan_id])
+        mean_time = mean_time.astype(np.int64).astype("datetime64[ns]")
+
+        new_data = data.isel(time=np.flatnonzero(complete))
+        new_data["scan_mean_time"] = xr.DataArray(
+            data=mean_time,
+            dims=("time"),
+            coords={"time": new_data.time},
+            name="scan_mean_time",
+        )
 
         return new_data
@@ -48,6 +48,10 @@ class Filtering:
     variables available in the WindCube's data. It is
     similar to the filter described in the manual
 
+    The quality masks and the beam selection indexes are
+    calculated only once and cached, so that they can be
+    reused for filtering several variables and beams.
+
     Parameters
     ----------
     data : xrarray.Dataset
@@ -58,6 +62,147 @@ class Filtering:
     def __init__(self, data):
 
         self.data = data
+        self.quality_masks = {}
+        self.beam_indexes = {}
+
+    def get_quality_mask(self, snr=False, status=True, vertical=False):
+        """Quality mask
+
+        It combines the status and SNR criteria in a single
+        boolean mask. The mask is cached using the vertical,
+        snr and status arguments as key.
+
+        Parameters
+        ----------
+        snr : bool, int, optional
+            if an interger is given it is used to
+            as threshold to filter the data based on
+            the signal to noise ratio
+
+        status : bool, optional
+            if true it uses the status variable
+            generated by the WindCube's software
+
+        vertical : bool, optional
+            if true the mask is built from the vertical
+            observations variables
+
+        Returns
+        -------
+        mask : xarray.DataArray, None
+            the boolean mask, or None if no criteria is used
+
+        """
+
+        key = (vertical, snr, status)
+
+        if key not in self.quality_masks:
+
+            suffix = "90" if vertical else ""
+            mask = None
+
+            if status:
+                mask = (
+                    getattr(self.data, f"radial_wind_speed_status{suffix}")
+                    == 1
+                )
+
+            if snr is not False:
+                snr_mask = getattr(self.data, f"cnr{suffix}") > snr
+                mask = snr_mask if mask is None else mask & snr_mask
+
+            self.quality_masks[key] = mask
+
+        return self.quality_masks[key]
+
+    def get_beam_index(self, azm=None):
+        """Beam selection indexes
+
+        It identifies the time indexes of the vertical
+        observations or of the slanted observations from
+        a given azimuth. The indexes are cached.
+
+        Parameters
+        ----------
+        azm : float, optional
+            azimuth of the slanted beam. If None, the indexes
+            of the vertical observations are returned
+
+        Returns
+        -------
+        index : numpy.ndarray
+            time indexes of the selected beam
+
+        """
+
+        if azm not in self.beam_indexes:
+
+            if azm is None:
+                selection = self.data.elevation == 90
+            else:
+                selection = (self.data.elevation != 90) & (
+                    self.data.azimuth == azm
+                )
+
+            self.beam_indexes[azm] = np.flatnonzero(selection.values)
+
+        return self.beam_indexes[azm]
+
+    def select(self, variable, index, mask):
+        """
+        It selects the beam and applies the quality mask
+        """
+
+        tmp_data = self.data[variable].isel(time=index)
+
+        if mask is None:
+            return tmp_data.where(True)
+
+        return tmp_data.where(mask.isel(time=index))
+
+    def extract(self, variables, beam="vertical", snr=False, status=True):
+        """Multi-variable filter
+
+        It selects one beam and applies the quality mask
+        to several variables at once
+
+        Parameters
+        ----------
+        variables : list
+            names of the variables that will be filtered
+
+        beam : str, float, optional
+            "vertical" for the vertical observations or the
+            azimuth of the slanted beam
+
+        snr : bool, int, optional
+            if an interger is given it is used to
+            as threshold to filter the data based on
+            the signal to noise ratio
+
+        status : bool, optional
+            if true it filters the data using the status
+            variable generated by the WindCube's software
+
+        Returns
+        -------
+        tmp_data : xarray.Dataset
+            a dataset of the requested variables filtered
+            using SNR or status variable
+
+        """
+
+        if isinstance(variables, str):
+            raise TypeError("variables must be a list of names")
+
+        if beam == "vertical":
+            index = self.get_beam_index()
+            mask = self.get_quality_mask(snr=snr, status=status, vertical=True)
+        else:
+            index = self.get_beam_index(beam)
+            mask = self.get_quality_mask(snr=snr, status=status)
+
+        return self.select(list(variables), index, mask)
 
     def get_vertical_obs_comp(self, variable, snr=False, status=True):
         """Vertical data filter
@@ -87,19 +232,9 @@ class Filtering:
 
         """
 
-        tmp_data = self.data[variable]
-
-        if status:
-            tmp_data = tmp_data.where(
-                self.data.radial_wind_speed_status90 == 1
-            )
-
-        if snr is not False:
-            tmp_data = tmp_data.where(self.data.cnr90 > snr)
-
-        tmp_data = tmp_data.where(self.data.elevation == 90, drop=True)
+        mask = self.get_quality_mask(snr=snr, status=status, vertical=True)
 
-        return tmp_data
+        return self.select(variable, self.get_beam_index(), mask)
 
     def get_radial_obs_comp(self, variable, azm, snr=False, status=True):
         """Slanted data filter
@@ -130,19 +265,9 @@ class Filtering:
 
         """
 
-        tmp_data = self.data[variable]
-
-        if status:
-            tmp_data = tmp_data.where(self.data.radial_wind_speed_status == 1)
-
-        if snr is not False:
-            tmp_data = tmp_data.where(self.data.cnr > snr)
-
-        tmp_data = tmp_data.where(
-            (self.data.elevation != 90) & (self.data.azimuth == azm), drop=True
-        )
+        mask = self.get_quality_mask(snr=snr, status=status)
 
-        return tmp_data
+        return self.select(variable, self.get_beam_index(azm), mask)
 
 
 # it removes the STE below cloud layer
@@ -0,0 +1,209 @@
+"""Module for the scan geometry
+
+The geometry of a scan pattern, i.e. the azimuths and elevations
+of its beams, is the same for all files of a campaign. The
+functions from this module calculate the direction cosines and
+the matrices derived from them only once for each pattern, and
+return them from a cache afterwards. The returned arrays are
+read-only, since they are shared by all callers.
+
+"""
+import functools
+
+import numpy as np
+
+
+def _pattern_key(values):
+    """It converts an array-like into a hashable tuple of floats"""
+
+    return tuple(np.asarray(values, dtype=float).ravel().tolist())
+
+
+def _read_only(array):
+
+    array.flags.writeable = False
+
+    return array
+
+
+def _cached_by_pattern(func):
+    """
+    It memoises a function of array-like arguments in an LRU cache,
+    using the values of the arguments as the key.
+    """
+
+    cached_func = functools.lru_cache(maxsize=128)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        return cached_func(*(_pattern_key(arg) for arg in args))
+
+    wrapper.cache_info = cached_func.cache_info
+    wrapper.cache_clear = cached_func.cache_clear
+
+    return wrapper
+
+
+@_cached_by_pattern
+def direction_cosines(azimuth, elevation):
+    """Direction cosines
+
+    It calculates the unit vector of each beam.
+
+    Parameters
+    ----------
+    azimuth : array-like
+        azimuth of each beam in degrees, clockwise from north
+
+    elevation : array-like
+        elevation of each beam in degrees
+
+    Returns
+    -------
+    np.array
+        a (beam, 3) array with the east, north and
+        upward components of each beam
+
+    """
+
+    azimuth = np.deg2rad(azimuth)
+    elevation = np.deg2rad(elevation)
+
+    cosines = np.stack(
+        [
+            np.sin(azimuth) * np.cos(elevation),
+            np.cos(azimuth) * np.cos(elevation),
+            np.sin(elevation),
+        ],
+        axis=1,
+    )
+
+    return _read_only(cosines)
+
+
+@_cached_by_pattern
+def dbs_pseudo_inverse(azimuth, elevation):
+    """DBS pseudo-inverse
+
+    It calculates the pseudo-inverse of the geometry matrix
+    that projects the (u, v, w) wind on the beams, i.e. the
+    least squares solution of the DBS retrieval.
+
+    Parameters
+    ----------
+    azimuth : array-like
+        azimuth of each beam in degrees
+
+    elevation : array-like
+        elevation of each beam in degrees
+
+    Returns
+    -------
+    np.array
+        a (3, beam) array, or None if the beams do not
+        constrain the three wind components
+
+    """
+
+    geometry = direction_cosines(azimuth, elevation)
+
+    if np.linalg.matrix_rank(geometry) < 3:
+        return None
+
+    return _read_only(np.linalg.pinv(geometry))
+
+
+@_cached_by_pattern
+def six_beam_m_matrix(azimuth, elevation):
+    """6 beam coefficient matrix
+
+    It calculates the coefficient matrix (M) from equation 3
+    from Newman et. all 2016, relating the variances of the
+    radial velocities of each beam to the Reynolds stress
+    tensor components (u, v, w, uv, uw, vw).
+    See: https://doi.org/10.5194/amt-9-1993-2016
+
+    Parameters
+    ----------
+    azimuth : array-like
+        azimuth of each beam in degrees
+
+    elevation : array-like
+        elevation of each beam in degrees
+
+    Returns
+    -------
+    np.array
+        a (beam, 6) array
+
+    """
+
+    east, north, up = direction_cosines(azimuth, elevation).T
+
+    m_matrix = np.stack(
+        [
+            east**2,
+            north**2,
+            up**2,
+            2 * east * north,
+            2 * east * up,
+            2 * north * up,
+        ],
+        axis=1,
+    )
+
+    return _read_only(m_matrix)
+
+
+@_cached_by_pattern
+def six_beam_m_matrix_inv(azimuth, elevation):
+    """Inverse of the 6 beam coefficient matrix
+
+    Parameters
+    ----------
+    azimuth : array-like
+        azimuth of each of the 6 beams in degrees
+
+    elevation : array-like
+        elevation of each of the 6 beams in degrees
+
+    Returns
+    -------
+    np.array
+        a (6, 6) array
+
+    """
+
+    return _read_only(np.linalg.inv(six_beam_m_matrix(azimuth, elevation)))
+
+
+@_cached_by_pattern
+def first_harmonic_kernel(azimuth):
+    """First harmonic kernel
+
+    It calculates the frequency and the cosine and sine
+    kernels of the first harmonic of evenly spaced azimuths.
+    The phase is referenced to the azimuth values.
+
+    Parameters
+    ----------
+    azimuth : array-like
+        evenly spaced azimuths in degrees
+
+    Returns
+    -------
+    frequency : float
+        frequency of the first harmonic
+
+    cos_kernel : np.array
+
+    sin_kernel : np.array
+
+    """
+
+    azimuth = np.asarray(azimuth)
+
+    frequency = 1 / (azimuth.size * np.abs(azimuth[1] - azimuth[0]))
+    phase = 2 * np.pi * frequency * azimuth
+
+    return frequency, _read_only(np.cos(phase)), _read_only(np.sin(phase))
@@ -1,9 +1,16 @@
+import concurrent.futures
+import functools
+import logging
+import os
+
 import datatree
 import pandas as pd
 import xarray as xr
 
+module_logger = logging.getLogger("lidarwind.io")
+
 
-def open_sweep(file_name):
+def open_sweep(file_name, sweep_only=False, variables=None):
     """Windcube's data reader
 
     It opens and reads the original NetCDF output
@@ -15,6 +22,16 @@ def open_sweep(file_name):
     file_name : str
         path to the file that will be opened
 
+    sweep_only : bool, optional
+        If True, only the root group (to find the sweep group name)
+        and the sweep group are read, instead of the full tree.
+        It is faster for small files since the metadata of the
+        other groups is never parsed.
+
+    variables : list, optional
+        If given, only these variables (and the coordinates) are
+        kept in the returned dataset.
+
     Returns
     -------
     ds : xarray.DataSet
@@ -22,15 +39,27 @@ def open_sweep(file_name):
         a dataset from the original NetCDF files
     """
 
-    raw_data = datatree.open_datatree(file_name, decode_times=False)
+    if sweep_only:
+        with xr.open_dataset(file_name, decode_times=False) as root:
+            assert (
+                "sweep_group_name" in root
+            ), "missing sweep group variable in input file"
+            sweep_group_name = root["sweep_group_name"].values[0]
 
-    assert (
-        "sweep_group_name" in raw_data
-    ), "missing sweep group variable in input file"
-    sweep_group_name = raw_data["sweep_group_name"].values[0]
-    ds = raw_data[f"/{sweep_group_name}"].to_dataset()
+        ds = xr.open_dataset(
+            file_name, group=sweep_group_name, decode_times=False
+        )
 
-    del raw_data
+    else:
+        raw_data = datatree.open_datatree(file_name, decode_times=False)
+
+        assert (
+            "sweep_group_name" in raw_data
+        ), "missing sweep group variable in input file"
+        sweep_group_name = raw_data["sweep_group_name"].values[0]
+        ds = raw_data[f"/{sweep_group_name}"].to_dataset()
+
+        del raw_data
 
     if "time_reference" in ds:
         # Guarantee that it is a valid datetime
@@ -39,6 +68,149 @@ def open_sweep(file_name):
         ).isoformat()
         ds["time"].attrs["units"] = f"seconds since {reference_time}"
 
+    if variables is not None:
+        ds = ds[list(variables)]
+
     ds = xr.decode_cf(ds)
 
     return ds
+
+
+def _load_sweep(file_name, **kwargs):
+    """Open a sweep and load it into memory
+
+    The data is loaded before returning so that the reading
+    and decoding happen in the worker and not when the
+    dataset is first accessed by the caller.
+    """
+
+    ds = open_sweep(file_name, **kwargs)
+    ds.load()
+    ds.close()
+
+    return ds
+
+
+def _map_files(func, file_names, workers=None, executor="process"):
+    """Apply a function to a list of files using a worker pool
+
+    Parameters
+    ----------
+    func : callable
+        function applied to each file name. It must be picklable
+        (defined at module level) when executor is "process".
+
+    file_names : list
+        list of file paths
+
+    workers : int, optional
+        number of workers. If None, the number of CPUs is used.
+        If 1, the files are processed sequentially without a pool.
+
+    executor : str
+        "process" or "thread"
+
+    Returns
+    -------
+    results : list
+        the output of func for each file, in the same order as
+        file_names. Failed files are represented by None.
+
+    errors : dict
+        the exception raised for each failed file, keyed by file name.
+        Each failure is also logged as a warning.
+    """
+
+    if executor not in ("process", "thread"):
+        raise ValueError(f"{executor} is not a valid executor")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    results = [None] * len(file_names)
+    errors = {}
+
+    if workers == 1:
+        for i, file_name in enumerate(file_names):
+            try:
+                results[i] = func(file_name)
+            except Exception as err:
+                module_logger.warning(
+                    f"This file has a problem: {file_name} ({err!r})"
+                )
+                errors[file_name] = err
+
+        return results, errors
+
+    if executor == "process":
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    with pool:
+        futures = {
+            pool.submit(func, file_name): i
+            for i, file_name in enumerate(file_names)
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as err:
+                module_logger.warning(
+                    f"This file has a problem: {file_names[i]} ({err!r})"
+                )
+                errors[file_names[i]] = err
+
+    return results, errors
+
+
+def open_sweeps(file_names, workers=None, executor="process", **kwargs):
+    """Parallel Windcube's data reader
+
+    It opens, decodes and loads many Windcube sweep files
+    at once by distributing them over a pool of workers.
+    A file that cannot be read does not stop the others;
+    its error is collected and returned instead.
+
+    Parameters
+    ----------
+    file_names : list
+        paths to the files that will be opened
+
+    workers : int, optional
+        number of workers. If None, the number of CPUs is used.
+        If 1, the files are read sequentially.
+
+    executor : str
+        "process" (default) or "thread". Processes avoid the
+        global lock that serialises access to the NetCDF library.
+
+    **kwargs
+        passed to open_sweep, e.g. sweep_only and variables
+
+    Returns
+    -------
+    datasets : list
+        a dataset for each file, in the same order as file_names.
+        Files that could not be read are represented by None.
+
+    errors : dict
+        the exception raised while reading each failed file,
+        keyed by file name
+
+    Examples
+    --------
+    >>> datasets, errors = lidarwind.io.open_sweeps(file_list, workers=16)
+    """
+
+    if isinstance(file_names, str):
+        raise TypeError("file_names must be a list of paths")
+
+    return _map_files(
+        functools.partial(_load_sweep, **kwargs),
+        list(file_names),
+        workers=workers,
+        executor=executor,
+    )
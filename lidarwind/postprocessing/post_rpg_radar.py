@@ -1,9 +1,11 @@
 import xarray as xr
 
-from ..wind_retrieval.fft_wind_retrieval import get_wind_properties
+from ..io import _map_files
+from ..preprocessing import rpg_radar
+from ..wind_retrieval import fft_wind_retrieval, sine_fit_wind_retrieval
 
 
-def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
+def get_horizontal_wind(ds: xr.Dataset, method="fft") -> xr.Dataset:
 
     """Horizontal wind dataset
 
@@ -17,7 +19,12 @@ def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
     -----------
     ds : xr.Dataset
         A preprocessed dataset: output from
-        rpg_slanted_radial_velocity_4_fft
+        rpg_slanted_radial_velocity_4_fft or
+        rpg_slanted_radial_velocity_4_sine_fit
+
+    method : str
+        "fft" or "sine_fit". The sine fit does not
+        require a regular and complete azimuth grid.
 
     Returns:
     --------
@@ -32,6 +39,14 @@ def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
     if not isinstance(ds, xr.Dataset):
         raise TypeError(f"{ds} is not an instance of xr.Dataset")
 
+    retrievals = {
+        "fft": fft_wind_retrieval.get_wind_properties,
+        "sine_fit": sine_fit_wind_retrieval.get_wind_properties,
+    }
+
+    if method not in retrievals:
+        raise ValueError(f"{method} is not a valid retrieval method")
+
     required_variables = [
         "start_scan",
         "end_scan",
@@ -47,8 +62,73 @@ def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
         if v not in ds:
             raise KeyError(f"{v} is not available in the provided dataset")
 
-    wind_ds = get_wind_properties(ds.MeanVel)
+    wind_ds = retrievals[method](ds.MeanVel)
     wind_ds = wind_ds.merge(ds[required_variables])
-    wind_ds = wind_ds.expand_dims(["mean_time"])
+
+    if "mean_time" in wind_ds.dims:
+        wind_ds = wind_ds.transpose("mean_time", ...)
+    else:
+        wind_ds = wind_ds.expand_dims(["mean_time"])
 
     return wind_ds
+
+
+def _preprocess_file(file_name):
+    """
+    It opens and preprocesses a single RPG PPI file
+    """
+
+    with xr.open_dataset(file_name) as ds:
+        ds = ds.load()
+
+    return rpg_radar.rpg_slanted_radial_velocity_4_fft(ds)
+
+
+def get_horizontal_wind_batch(
+    file_names, workers=None, executor="process"
+) -> xr.Dataset:
+
+    """Horizontal wind dataset from many PPI files
+
+    The files are preprocessed over a pool of workers,
+    the regularised scans are stacked along mean_time
+    and the FFT retrieval is applied once to the whole
+    stack. Files that cannot be processed are skipped,
+    and the error of each one is logged as a warning
+    by lidarwind.io.
+
+    Parameters:
+    -----------
+    file_names : list
+        paths to the original RPG PPI files
+
+    workers : int, optional
+        number of workers. If None, the number of CPUs is used.
+        If 1, the files are processed sequentially.
+
+    executor : str
+        "process" (default) or "thread"
+
+    Returns:
+    --------
+    xr.Dataset
+        Final horizontal wind dataset of all scans
+
+    """
+
+    if isinstance(file_names, str):
+        raise TypeError("file_names must be a list of paths")
+
+    preprocessed, errors = _map_files(
+        _preprocess_file, list(file_names), workers=workers, executor=executor
+    )
+    preprocessed = [ds for ds in preprocessed if ds is not None]
+
+    if not preprocessed:
+        raise ValueError(
+            f"none of the files could be processed: {list(errors)}"
+        )
+
+    ds = xr.concat(preprocessed, dim="mean_time").sortby("mean_time")
+
+    return get_horizontal_wind(ds)
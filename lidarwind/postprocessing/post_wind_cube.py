@@ -1,11 +1,22 @@
+import logging
+
 import numpy as np
+import pandas as pd
 import xarray as xr
 
-from ..preprocessing.wind_cube import wc_slanted_radial_velocity_4_fft
+from ..data_operator import concat_along_time
+from ..preprocessing.wind_cube import (
+    _half_cycle_duration,
+    wc_azimuth_elevation_correction,
+    wc_fixed_merge_files,
+    wc_slanted_radial_velocity_4_fft,
+)
 from ..wind_retrieval.fft_wind_retrieval import get_wind_properties
 
+module_logger = logging.getLogger("lidarwind.postprocessing.post_wind_cube")
+
 
-def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
+def get_horizontal_wind(ds: xr.Dataset, half_cycle=None) -> xr.Dataset:
     """Apply fft retrieval
 
     This function applies the fft wind retrieval method
@@ -16,6 +27,10 @@ def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
     ds : xr.Dataset
         A dataset of preprocessed observations
 
+    half_cycle : float, optional
+        Half of the scan cycle duration in seconds.
+        If None, it is estimated from the data.
+
     Returns
     -------
         The input dataset, but including the horizontal
@@ -26,7 +41,9 @@ def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
     unique_elevation = np.unique(ds.elevation)[np.unique(ds.elevation) != 90]
     ds_slanted = ds.where(ds.elevation == unique_elevation, drop=True)
 
-    radial_velocities = wc_slanted_radial_velocity_4_fft(ds_slanted)
+    radial_velocities = wc_slanted_radial_velocity_4_fft(
+        ds_slanted, half_cycle=half_cycle
+    )
     horizontal_wind = get_wind_properties(radial_velocities.radial_wind_speed)
 
     ds = ds.merge(horizontal_wind)
@@ -34,6 +51,166 @@ def get_horizontal_wind(ds: xr.Dataset) -> xr.Dataset:
     return ds
 
 
+class IncrementalWindProcessor:
+    """Incremental wind retrieval
+
+    It processes the WindCube fixed files as they arrive.
+    Only new files are read and only the newly completed
+    profiles are returned. A profile at a given time is
+    complete when the rays up to half a scan cycle later
+    are available, since they can contribute to it. The
+    last scan cycles are kept in a buffer for the next update.
+    The half scan cycle duration is estimated only once, from
+    the first update with enough data, so that all profiles
+    are retrieved with the same tolerance.
+
+    Profiles are returned only once. Rays from files that
+    arrive late, i.e. older than the last returned profile,
+    are merged into the buffer when they are within half a
+    scan cycle of it, so that they contribute to the profiles
+    not returned yet. Older late rays cannot change any of
+    the next profiles and are dropped. A warning is logged
+    in both cases, since the profiles already returned are
+    not revised.
+
+    Examples
+    --------
+    >>> processor = IncrementalWindProcessor()
+    >>> new_wind = processor.update(file_list)
+    >>> last_wind = processor.flush()
+
+    Parameters
+    ----------
+    buffer_cycles : int
+        number of scan cycles kept in the buffer before
+        the last returned profile
+
+    """
+
+    def __init__(self, buffer_cycles=2):
+
+        self.buffer_cycles = buffer_cycles
+        self.buffer = None
+        self.processed_files = set()
+        self.last_time = None
+        self.half_cycle = None
+
+    def update(self, file_names: list):
+        """
+        It adds the files that were not processed yet to the
+        buffer and returns the newly completed profiles, or
+        None if there is none.
+        """
+
+        new_files = [
+            file
+            for file in dict.fromkeys(file_names)
+            if file not in self.processed_files
+        ]
+
+        if not new_files:
+            return None
+
+        new_ds = wc_azimuth_elevation_correction(
+            wc_fixed_merge_files(new_files)
+        ).load()
+        self.processed_files.update(new_files)
+
+        if self.last_time is not None:
+            new_ds = self.merge_late_rays(new_ds)
+
+            if new_ds["time"].size == 0:
+                return None
+
+        if self.buffer is None:
+            self.buffer = new_ds
+        else:
+            self.buffer = concat_along_time([self.buffer, new_ds])
+
+        return self.emit()
+
+    def merge_late_rays(self, new_ds):
+        """
+        It logs the rays older than the last returned profile
+        and drops those that are more than half a scan cycle
+        older, since they cannot contribute to the next profiles.
+        """
+
+        time = new_ds["time"].values
+        late = time <= self.last_time
+
+        if not late.any():
+            return new_ds
+
+        oldest_useful = self.last_time - pd.to_timedelta(self.half_cycle, "s")
+        useless = time <= oldest_useful
+
+        module_logger.warning(
+            f"{late.sum()} rays arrived after the profiles up to "
+            f"{self.last_time} were returned; {late.sum() - useless.sum()} "
+            f"were merged for the next profiles and {useless.sum()} "
+            "were dropped"
+        )
+
+        return new_ds.isel(time=np.flatnonzero(~useless))
+
+    def flush(self):
+        """
+        It returns all remaining profiles, including those
+        that are not complete, and empties the buffer.
+        """
+
+        wind = self.emit(final=True)
+        self.buffer = None
+
+        return wind
+
+    def emit(self, final=False):
+        """
+        It retrieves the wind from the buffer, returns the
+        profiles not returned before and trims the buffer.
+        """
+
+        if self.buffer is None:
+            return None
+
+        if self.half_cycle is None:
+
+            ds_slanted = self.buffer.where(
+                self.buffer.elevation != 90, drop=True
+            )
+            azimuth = ds_slanted["azimuth"].values
+
+            if azimuth.size == 0 or np.sum(azimuth == azimuth[0]) < 2:
+                return None
+
+            self.half_cycle = _half_cycle_duration(ds_slanted)
+
+        half_cycle = pd.to_timedelta(self.half_cycle, "s")
+
+        wind = get_horizontal_wind(self.buffer, half_cycle=self.half_cycle)
+        time = wind["time"].values
+
+        selection = np.ones(time.size, dtype=bool)
+
+        if self.last_time is not None:
+            selection &= time > self.last_time
+
+        if not final:
+            selection &= time <= time.max() - half_cycle
+
+        if not selection.any():
+            return None
+
+        wind = wind.isel(time=selection)
+        self.last_time = time[selection].max()
+
+        buffer_start = self.last_time - 2 * self.buffer_cycles * half_cycle
+        self.buffer = self.buffer.sel(time=slice(buffer_start, None))
+
+        return wind
+
+
 # Post processing
 def wc_extract_wind(ds: xr.Dataset, method="full") -> xr.Dataset:
     """Wind profiles extraction
@@ -596,3 +596,50 @@ def rpg_slanted_radial_velocity_4_fft(ds):
     ds = ds.merge(chirp_info)
 
     return ds
+
+
+def rpg_slanted_radial_velocity_4_sine_fit(ds):
+
+    """RPG preprocessing template for the sine fit
+
+    It is a processing template for the RPG PPI
+    output dataset. Unlike rpg_slanted_radial_velocity_4_fft,
+    the data is kept on the measured azimuths and the
+    NaNs are neither interpolated nor filled, since the
+    sine fit handles irregular and incomplete scans.
+
+    Parameters
+    ----------
+    ds : xr.Dataset
+        An original PPI RPG dataset
+
+    Returns
+    -------
+    xr.Dataset
+        A dataset preprocessed for the wind retrieval
+
+    """
+
+    if not isinstance(ds, xr.Dataset):
+        raise TypeError
+
+    chirp_info = get_chirp_information(ds)
+
+    # pre-processing
+    ds = time_decoding(ds)
+    ds = selecting_variables(ds)
+    ds = azimuth_offset(ds)
+    ds = height_estimation(ds)
+
+    ds = update_range(ds)
+    ds = count_nan_values(ds)
+
+    # the gaps are skipped by the fit, interpolating
+    # them in time would bias the retrieval
+    ds = ds.drop_duplicates(dim="time")
+
+    ds = update_structure(ds)
+
+    ds = ds.merge(chirp_info)
+
+    return ds
@@ -1,8 +1,11 @@
+import os
+
 import numpy as np
 import pandas as pd
 import xarray as xr
 
 from lidarwind.io import open_sweep
+from lidarwind.utilities import nearest_index
 
 
 def wc_azimuth_elevation_correction(
@@ -82,17 +85,56 @@ def wc_fixed_files_restruc_dataset(ds: xr.Dataset):
     ds["gate_index"] = ds["gate_index"].astype("i")
     ds = ds.swap_dims({"range": "gate_index"}).reset_coords()
 
-    tmp_no_time = ds[
-        [v for v in ds.variables if "time" not in ds[v].dims]
-    ].expand_dims("time")
-    tmp_time = ds[[v for v in ds.variables if "time" in ds[v].dims]]
-
-    ds = xr.merge([tmp_no_time, tmp_time])
+    # adding the time dimension without merging
+    ds = ds.assign(
+        {
+            v: ds[v].expand_dims({"time": ds.sizes["time"]})
+            for v in ds.data_vars
+            if "time" not in ds[v].dims
+        }
+    )
     ds = ds.set_coords(["elevation", "azimuth", "range"])
 
     return ds
 
 
+def _concat_fixed_files(ds_list: list):
+
+    """
+    It concatenates restructured fixed files along time. Files
+    from the same beam share the gate layout, so a cheap check
+    replaces the alignment done by xr.merge, which is only used
+    if the check fails.
+    """
+
+    if not ds_list:
+        return xr.Dataset()
+
+    gate_index = ds_list[0]["gate_index"].values
+    variables = set(ds_list[0].variables)
+
+    same_layout = all(
+        np.array_equal(ds["gate_index"].values, gate_index)
+        and set(ds.variables) == variables
+        for ds in ds_list[1:]
+    )
+
+    if same_layout:
+        ds = xr.concat(
+            ds_list,
+            dim="time",
+            data_vars="minimal",
+            coords="minimal",
+            compat="override",
+            join="override",
+        )
+
+        if ds.indexes["time"].is_unique:
+            return ds.sortby("time")
+
+    return xr.merge(ds_list)
+
+
 def wc_fixed_merge_files(file_names: list):
 
     """Merging fixed type files
@@ -130,15 +172,102 @@ def wc_fixed_merge_files(file_names: list):
 
         tmp_ds.close()
 
-    ds_zenith = xr.merge(zenith_list)
-    ds_slanted = xr.merge(slanted_list)
+    ds_zenith = _concat_fixed_files(zenith_list)
+    ds_slanted = _concat_fixed_files(slanted_list)
 
     ds = xr.merge([ds_zenith, ds_slanted])
 
     return ds
 
 
-def wc_slanted_radial_velocity_4_fft(ds: xr.Dataset):
+def wc_fixed_merge_files_to_store(
+    file_names: list, store_path: str, batch_size: int = 500
+):
+
+    """Streaming merge of fixed type files
+
+    This function merges multiple fixed files without keeping
+    all of them in memory. The restructured files are written,
+    in batches, as NetCDF parts into a store directory, which
+    are then opened lazily and concatenated in time order.
+
+    Parameters
+    ----------
+    file_names : list
+        A list of fixed files to be merged
+
+    store_path : str
+        Directory where the NetCDF parts are written
+
+    batch_size : int
+        Number of fixed files written into each part
+
+    Returns
+    -------
+    xr.Dataset
+        A lazily opened dataset containing data from all
+        files specified in the file_names list
+
+    """
+
+    if bool(file_names) is False:
+        raise FileNotFoundError
+
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+
+    os.makedirs(store_path, exist_ok=True)
+
+    parts = []
+
+    for start in range(0, len(file_names), batch_size):
+
+        batch = []
+
+        for file in file_names[start : start + batch_size]:
+
+            tmp_ds = open_sweep(file)
+            batch.append(wc_fixed_files_restruc_dataset(tmp_ds).load())
+            tmp_ds.close()
+
+        tmp_ds = xr.concat(batch, dim="time", join="outer").sortby("time")
+
+        part_name = os.path.join(store_path, f"part_{len(parts):06d}.nc")
+        tmp_ds.to_netcdf(part_name)
+        parts.append((tmp_ds["time"].values[0], part_name))
+
+        del batch, tmp_ds
+
+    parts = [part_name for _, part_name in sorted(parts)]
+
+    ds = xr.open_mfdataset(parts, combine="nested", concat_dim="time")
+
+    if not ds.indexes["time"].is_monotonic_increasing:
+        ds = ds.sortby("time")
+
+    return ds
+
+
+def _half_cycle_duration(ds: xr.Dataset):
+
+    """
+    It identifies the mean duration of a complete scan cycle,
+    from the repetitions of the first azimuth, and returns
+    half of it in seconds.
+    """
+
+    cycle = (
+        ds["time"]
+        .where(ds.azimuth == ds.azimuth[0], drop=True)
+        .diff(dim="time")
+        .mean()
+        .values
+    )
+
+    return pd.to_timedelta(cycle).seconds / 2
+
+
+def wc_slanted_radial_velocity_4_fft(ds: xr.Dataset, half_cycle=None):
 
     """Extraction of slanted radial velocities
 
@@ -161,6 +290,11 @@ def wc_slanted_radial_velocity_4_fft(ds: xr.Dataset):
         corrected for azimuth and elevation ambiguity
         and from a single elevation.
 
+    half_cycle : float, optional
+        Half of the scan cycle duration in seconds, used as the
+        tolerance for the nearest ray. If None, it is estimated
+        from the data.
+
 
     Rerturns
     --------
@@ -186,51 +320,39 @@ def wc_slanted_radial_velocity_4_fft(ds: xr.Dataset):
             "Not enough data to estimate the one scan cylce duration"
         )
 
-    # initializing storage ds
-    radial_velocities = xr.Dataset()
+    if not np.issubdtype(ds["time"].dtype, np.datetime64):
+        raise ValueError("time must be a datetime coordinate")
 
-    # identify the mean duration of a complete scan cycle
-    half_cycle = (
-        ds.where(ds.azimuth == ds.azimuth[0], drop=True)
-        .time.diff(dim="time")
-        .mean()
-        .values
-    )
-    half_cycle = pd.to_timedelta(half_cycle).seconds / 2
+    if half_cycle is None:
+        half_cycle = _half_cycle_duration(ds)
+
+    tolerance = pd.to_timedelta(f"{half_cycle}s").to_timedelta64()
+
+    radial_wind_speed = ds["radial_wind_speed"].sortby("time")
+    time = radial_wind_speed["time"].values
+    ray_azimuth = radial_wind_speed["azimuth"].values
+    values = radial_wind_speed.transpose("time", ...).values
 
     # unique azimuths
     azimuth = np.unique(ds.azimuth)
 
-    for azm in azimuth:
+    # for each azimuth, the nearest ray to every time step
+    cube = np.full((len(azimuth),) + values.shape, np.nan)
 
-        # selecting the reference azimuthal slice
-        azimuth_left_over = azimuth[azimuth != azm]
-        tmp_reference_slice = ds["radial_wind_speed"].where(
-            ds["azimuth"] == azm, drop=True
-        )
-        tmp_reference_slice = (
-            tmp_reference_slice.drop(["azimuth"])
-            .assign_coords({"azimuth": azm})
-            .expand_dims(["azimuth"])
-        )
-        radial_velocities = xr.merge([radial_velocities, tmp_reference_slice])
-
-        for azm_left in azimuth_left_over:
-
-            tmp_azimuth_slice = ds["radial_wind_speed"].where(
-                ds["azimuth"] == azm_left, drop=True
-            )
-            interp_azimuth_slice = tmp_azimuth_slice.reindex(
-                time=tmp_reference_slice.time,
-                method="nearest",
-                tolerance=f"{half_cycle}s",
-            )
-            tmp_slice = (
-                interp_azimuth_slice.drop(["azimuth"])
-                .assign_coords({"azimuth": azm_left})
-                .expand_dims(["azimuth"])
-            )
-            radial_velocities = xr.merge([radial_velocities, tmp_slice])
+    for i, azm in enumerate(azimuth):
+
+        rays = np.flatnonzero(ray_azimuth == azm)
+        nearest = nearest_index(time[rays], time, tolerance)
+        valid = nearest >= 0
+        cube[i, valid] = values[rays[nearest[valid]]]
+
+    radial_velocities = (
+        radial_wind_speed.transpose("time", ...)
+        .drop_vars("azimuth")
+        .expand_dims({"azimuth": azimuth})
+        .copy(data=cube)
+        .to_dataset()
+    )
 
     radial_velocities["azimuth"].attrs = ds["azimuth"].attrs
 
@@ -41,6 +41,203 @@ def sample_data(key: str):
     return file_list
 
 
+def nearest_index(grid, values, tolerance=None, tie="later"):
+    """Nearest neighbour index
+
+    For each element of values, it finds the index of the nearest
+    element of a sorted grid using a binary search, i.e. without
+    building the matrix of distances between both arrays.
+
+    Parameters
+    ----------
+    grid : np.array
+        reference values sorted in increasing order (e.g. time)
+
+    values : np.array
+        values to be located in the grid
+
+    tolerance : optional
+        maximum distance between a value and its nearest grid
+        element. It must be comparable with the differences between
+        values and grid (e.g. np.timedelta64 for datetimes).
+
+    tie : str
+        neighbour selected when both are equally distant:
+        "later" (default), as in the nearest method from pandas
+        and xarray, or "earlier", as in np.argmin of the distances.
+
+    Returns
+    -------
+    index : np.array
+        index of the nearest grid element for each value. It is -1
+        if there is no element within the tolerance or if the
+        value is not valid (NaN/NaT).
+
+    """
+
+    if tie not in ("earlier", "later"):
+        raise ValueError(f"{tie} is not a valid tie option")
+
+    grid = np.asarray(grid)
+    values = np.asarray(values)
+
+    if grid.size == 0:
+        return np.full(values.shape, -1, dtype=np.intp)
+
+    right = np.searchsorted(grid, values, side="left")
+    right = np.clip(right, 0, grid.size - 1)
+    left = np.clip(right - 1, 0, grid.size - 1)
+
+    distance_left = np.abs(values - grid[left])
+    distance_right = np.abs(grid[right] - values)
+
+    if tie == "earlier":
+        pick_left = distance_left <= distance_right
+    else:
+        pick_left = distance_left < distance_right
+
+    index = np.where(pick_left, left, right)
+    distance = np.where(pick_left, distance_left, distance_right)
+
+    # NaN and NaT are not equal to themselves
+    valid = distance == distance
+
+    if tolerance is not None:
+        valid &= distance <= tolerance
+
+    index[~valid] = -1
+
+    return index
+
+
+def _block_rolling_variance(
+    block, offset, size, before, after, min_periods, ddof
+):
+    """Rolling variance of a block from cumulative sums
+
+    It returns the variance at the positions offset to
+    offset + size of the block, using the elements of the
+    block within the window of each position.
+    """
+
+    valid = ~np.isnan(block)
+    count = valid.sum(axis=0)
+
+    # shifting by the mean reduces the cancellation errors
+    with np.errstate(invalid="ignore", divide="ignore"):
+        reference = np.where(
+            count > 0, np.where(valid, block, 0).sum(axis=0) / count, 0
+        )
+    shifted = np.where(valid, block - reference, 0)
+
+    padding = np.zeros((1,) + block.shape[1:])
+    sum_1 = np.concatenate([padding, np.cumsum(shifted, axis=0)])
+    sum_2 = np.concatenate([padding, np.cumsum(shifted**2, axis=0)])
+    sum_n = np.concatenate([padding, np.cumsum(valid, axis=0)])
+
+    position = np.arange(offset, offset + size)
+    lower = np.clip(position - before, 0, block.shape[0])
+    upper = np.clip(position + after + 1, 0, block.shape[0])
+
+    window_1 = sum_1[upper] - sum_1[lower]
+    window_2 = sum_2[upper] - sum_2[lower]
+    window_n = sum_n[upper] - sum_n[lower]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (window_2 - window_1**2 / window_n) / (window_n - ddof)
+
+    # a single element has no spread, whatever the rounding errors
+    variance = np.where(window_n == 1, 0, np.maximum(variance, 0))
+    variance[(window_n < min_periods) | (window_n <= ddof)] = np.nan
+
+    return variance
+
+
+def rolling_variance(
+    values,
+    window,
+    min_periods=None,
+    center=False,
+    ddof=0,
+    axis=0,
+    chunk_size=None,
+):
+    """Rolling variance
+
+    It calculates the variance within a moving window from
+    cumulative sums, so the cost does not depend on the window
+    size and no windowed view of the data is created. NaNs are
+    ignored, and the window position and the defaults follow
+    DataArray.rolling(...).var().
+
+    Parameters
+    ----------
+    values : np.array
+        input array
+
+    window : int
+        number of elements in the window
+
+    min_periods : int, optional
+        minimum number of valid elements in the window,
+        otherwise the variance is NaN. If None, it is the window.
+
+    center : bool
+        if True, the window is centred on each element
+
+    ddof : int
+        delta degrees of freedom
+
+    axis : int
+        axis along which the window moves (e.g. time)
+
+    chunk_size : int, optional
+        if given, the array is processed in chunks of this number
+        of elements along axis, with overlaps of one window. It
+        bounds the memory used by the cumulative sums.
+
+    Returns
+    -------
+    variance : np.array
+        an array with the same shape as values
+
+    """
+
+    if min_periods is None:
+        min_periods = window
+
+    if window < 1 or min_periods < 1:
+        raise ValueError("window and min_periods must be greater than zero")
+
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, 0)
+    n_values = values.shape[0]
+
+    after = window - 1 - window // 2 if center else 0
+    before = window - 1 - after
+
+    if chunk_size is None:
+        chunk_size = max(n_values, 1)
+
+    variance = np.empty_like(values)
+
+    for start in range(0, n_values, chunk_size):
+
+        stop = min(start + chunk_size, n_values)
+        block_start = max(start - before, 0)
+
+        variance[start:stop] = _block_rolling_variance(
+            values[block_start : stop + after],
+            start - block_start,
+            stop - start,
+            before,
+            after,
+            min_periods,
+            ddof,
+        )
+
+    return np.moveaxis(variance, 0, axis)
+
+
 class Util:
 
     """
@@ -57,6 +57,7 @@ class Visualizer:
     def __init__(self, data):
 
         self.data = data
+        self.filtering = Filtering(data)
 
     def view_orig_var(
         self,
@@ -92,7 +93,7 @@ class Visualizer:
             )
 
         else:
-            tmp_data = Filtering(self.data).get_vertical_obs_comp(var_name)
+            tmp_data = self.filtering.get_vertical_obs_comp(var_name)
 
             if name_prefix:
                 std_name = tmp_data.attrs["standard_name"]
@@ -1,11 +1,14 @@
 import logging
 
 import numpy as np
+import pandas as pd
 import xarray as xr
 import xrft
 
+from . import geometry
 from .data_attributes import LoadAttributes
 from .data_operator import GetRestructuredData
+from .utilities import nearest_index
 
 module_logger = logging.getLogger("lidarwind.wind_prop_retrieval")
 module_logger.debug("loading wind_prop_retrieval")
@@ -27,6 +30,39 @@ def first_harmonic_amplitude(ds: xr.Dataset, dim="azm") -> xr.DataArray:
     return comp_amp.isel(freq_azm=-2)
 
 
+def hor_wind_speed(comp_u: xr.DataArray, comp_v: xr.DataArray):
+    """Horizontal wind speed
+
+    It calculates the horizontal wind speed from the
+    zonal and meridional wind components.
+
+    """
+
+    wind_speed = np.sqrt(comp_v**2.0 + comp_u**2.0)
+    wind_speed.name = "hor_wind_speed"
+    wind_speed.attrs["long_name"] = "wind_speed"
+    wind_speed.attrs["units"] = "m/s"
+
+    return wind_speed
+
+
+def hor_wind_dir(comp_u: xr.DataArray, comp_v: xr.DataArray):
+    """Horizontal wind direction
+
+    It derives the wind direction from the zonal and
+    meridional wind components. It follows the same
+    approach used by the lidar software.
+
+    """
+
+    wind_dir = 180 + np.rad2deg(np.arctan2(comp_u, comp_v))
+    wind_dir.name = "hor_wind_dir"
+    wind_dir.attrs["long_name"] = "wind_direction"
+    wind_dir.attrs["units"] = "deg"
+
+    return wind_dir
+
+
 class FourierTransfWindMethod:
     """FFT wind retrieval method
 
@@ -300,6 +336,9 @@ class GetWindProperties5Beam:
 
     """
 
+    # azimuths of the north, south, east and west beams
+    beam_azimuths = (0, 180, 90, 270)
+
     def __init__(
         self,
         data: xr.Dataset,
@@ -352,6 +391,7 @@ class GetWindProperties5Beam:
         self.range_val_90 = data.measurement_height.sel(time=time90)
         self.ver_wind_speed = data.radial_wind_speed.sel(time=time90)
         self.correct_vert_wind_comp()
+        self.get_beam_code()
 
         if method == "continuous":
             self.calc_hor_wind_comp_continuous()
@@ -404,102 +444,353 @@ class GetWindProperties5Beam:
 
         return self
 
+    def get_beam_code(self):
+        """
+        It classifies each slanted ray by its beam, using the
+        integer codes 0, 1, 2 and 3 for the north, south, east
+        and west beams, and -1 for any other azimuth.
+        """
+
+        azimuth = self.azimuth_non_90.values
+        beam_code = np.full(azimuth.shape, -1)
+
+        for code, beam_azimuth in enumerate(self.beam_azimuths):
+            beam_code[azimuth == beam_azimuth] = code
+
+        self.beam_code = beam_code
+
+        return self
+
+    def beam_comp_wind_speed(self):
+        """
+        It returns the projection of the radial velocities
+        on the horizontal, as a (time, gate_index) DataArray.
+        """
+
+        comp_wind_speed = self.rad_wind_speed_non_90 / (
+            2 * np.cos(np.deg2rad(self.elevation_non_90))
+        )
+
+        return comp_wind_speed.transpose("time", "gate_index")
+
+    def wind_comp_data_array(self, values, time, name):
+        """
+        It creates a wind component DataArray from a
+        (time, gate_index) array.
+        """
+
+        comp = xr.DataArray(values, dims=("time", "gate_index"), name=name)
+        comp = comp.assign_coords({"time": time})
+
+        return self.correct_wind_comp(comp)
+
     def calc_hor_wind_comp_single_dbs(self):
         """
         This method derives v and u components from the
         WindCube DBS files. The components are caculated
         from each individual DBS file. The mean time from each
         scan complete scan is used as identification tag.
+
+        The rays are gathered in a single pass into a
+        (scan, beam, gate) array, and only the scans with
+        both opposite beams are kept for each component.
         """
 
         self.logger.info(
             "calculating the horizontal wind using the SINGLE DBS method"
         )
 
-        comp_wind_speed = self.rad_wind_speed_non_90 / (
-            2 * np.cos(np.deg2rad(self.elevation_non_90))
-        )
+        comp_wind_speed = self.beam_comp_wind_speed().values
 
-        comp_vn = comp_wind_speed.where(self.azimuth_non_90 == 0, drop=True)
-        mean_time_vn = self.mean_time_non_90.where(
-            self.azimuth_non_90 == 0, drop=True
+        selected = self.beam_code >= 0
+        scan_time, scan_index = np.unique(
+            self.mean_time_non_90.values[selected], return_inverse=True
         )
-        comp_vn = comp_vn.assign_coords({"time": mean_time_vn})
-
-        comp_vs = comp_wind_speed.where(self.azimuth_non_90 == 180, drop=True)
-        mean_time_vs = self.mean_time_non_90.where(
-            self.azimuth_non_90 == 180, drop=True
+        beam_code = self.beam_code[selected]
+
+        beams = np.full(
+            (
+                scan_time.size,
+                len(self.beam_azimuths),
+                comp_wind_speed.shape[1],
+            ),
+            np.nan,
         )
-        comp_vs = comp_vs.assign_coords({"time": mean_time_vs})
+        beams[scan_index, beam_code] = comp_wind_speed[selected]
 
-        comp_ue = comp_wind_speed.where(self.azimuth_non_90 == 90, drop=True)
-        mean_time_ue = self.mean_time_non_90.where(
-            self.azimuth_non_90 == 90, drop=True
-        )
-        comp_ue = comp_ue.assign_coords({"time": mean_time_ue})
+        observed = np.zeros((scan_time.size, len(self.beam_azimuths)), bool)
+        observed[scan_index, beam_code] = True
 
-        comp_uw = comp_wind_speed.where(self.azimuth_non_90 == 270, drop=True)
-        mean_time_uw = self.mean_time_non_90.where(
-            self.azimuth_non_90 == 270, drop=True
-        )
-        comp_uw = comp_uw.assign_coords({"time": mean_time_uw})
+        complete_v = observed[:, 0] & observed[:, 1]
+        complete_u = observed[:, 2] & observed[:, 3]
 
-        self.comp_v = comp_vn - comp_vs
-        self.comp_u = comp_ue - comp_uw
-
-        self.comp_v.name = "comp_v"
-        self.comp_u.name = "comp_u"
+        self.comp_v = self.wind_comp_data_array(
+            beams[complete_v, 0] - beams[complete_v, 1],
+            scan_time[complete_v],
+            "comp_v",
+        )
+        self.comp_u = self.wind_comp_data_array(
+            beams[complete_u, 2] - beams[complete_u, 3],
+            scan_time[complete_u],
+            "comp_u",
+        )
 
-        self.comp_v = self.correct_wind_comp(self.comp_v)
-        self.comp_u = self.correct_wind_comp(self.comp_u)
+        return self
 
     def calc_hor_wind_comp_continuous(self):
         """
         Function to derive wind v and u components.
         It folows the same approach used by the lidar software.
+
+        The opposite beams are matched to the north and east
+        rays by a binary search of the nearest ray within the
+        tolerance.
         """
 
         self.logger.info(
             "calculating the horizontal wind using the CONTINUOUS DBS method"
         )
 
-        comp_wind_speed = self.rad_wind_speed_non_90 / (
-            2 * np.cos(np.deg2rad(self.elevation_non_90))
-        )
+        comp_wind_speed = self.beam_comp_wind_speed()
+        values = comp_wind_speed.values
+        time = comp_wind_speed.time.values
+        tolerance = pd.to_timedelta(self.tolerance).to_timedelta64()
 
-        self.comp_vn = comp_wind_speed.where(
-            self.azimuth_non_90 == 0, drop=True
+        north, south, east, west = (
+            np.flatnonzero(self.beam_code == code)
+            for code in range(len(self.beam_azimuths))
         )
-        self.comp_vs = comp_wind_speed.where(
-            self.azimuth_non_90 == 180, drop=True
+
+        self.comp_vn = comp_wind_speed.isel(time=north)
+        self.comp_vs = comp_wind_speed.isel(time=south)
+        self.comp_ue = comp_wind_speed.isel(time=east)
+        self.comp_uw = comp_wind_speed.isel(time=west)
+
+        def take_nearest(source, source_time, target_time):
+
+            index = nearest_index(source_time, target_time, tolerance)
+            nearest = np.full((index.size, values.shape[1]), np.nan)
+            nearest[index >= 0] = source[index[index >= 0]]
+
+            return nearest
+
+        comp_v = values[north] - take_nearest(
+            values[south], time[south], time[north]
         )
-        comp_vs = self.comp_vs.reindex(
-            time=self.comp_vn.time, method="Nearest", tolerance=self.tolerance
+        comp_u = values[east] - take_nearest(
+            values[west], time[west], time[east]
         )
+        comp_u = take_nearest(comp_u, time[east], time[north])
 
-        self.comp_ue = comp_wind_speed.where(
-            self.azimuth_non_90 == 90, drop=True
+        self.comp_v = self.wind_comp_data_array(comp_v, time[north], "comp_v")
+        self.comp_u = self.wind_comp_data_array(comp_u, time[north], "comp_u")
+
+        return self
+
+    def calc_hor_wind_speed(self):
+        """
+        Function to calculate the wind speed.
+        """
+
+        self.logger.info(
+            "calculating the horizontal wind speed using DBS observations"
         )
-        self.comp_uw = comp_wind_speed.where(
-            self.azimuth_non_90 == 270, drop=True
+
+        self.hor_wind_speed = hor_wind_speed(self.comp_u, self.comp_v)
+
+        return self
+
+    def calc_hor_wind_dir(self):
+        """
+        Function to derive wind direction. It follows the same
+        approach used by the lidar software.
+        """
+
+        self.logger.info("retrieving the wind direction using DBS observation")
+
+        self.hor_wind_dir = hor_wind_dir(self.comp_u, self.comp_v)
+
+        return self
+
+
+class GetWindPropertiesNBeam:
+    """N-beam DBS wind retrieval
+
+    This class retrieves the wind from DBS scans with any
+    number of beams (e.g. 3, 4, 5 or 8 beams). In each scan,
+    the u, v and w components are fitted by least squares to
+    the radial velocities of all beams:
+
+    vr = u sin(azm) cos(elv) + v cos(azm) cos(elv) + w sin(elv)
+
+    The scans are grouped by their pattern of azimuths and
+    elevations. Within a pattern, the scans and range gates are
+    grouped by the beams with valid data, and each group is
+    solved at once using only those beams. The pseudo-inverse
+    of the geometry matrix is calculated only once for each set
+    of beams, so a missing beam or gate only creates a new
+    group. The components are NaN where fewer than three beams
+    are valid or where the beams do not constrain all three
+    components. The range is the height of the vertical beam,
+    as in GetWindProperties5Beam, or of the first ray if the
+    scans have no vertical beam.
+
+    Parameters
+    ----------
+    data : xarray.Dataset
+        merged xarray dataset (merged_ds) output from
+        lidarwind.DbsOperations()
+
+    status_filter : bolean
+        Data filtering based on the wind lidar
+        wind status variable. If True, all data with status not
+        equal to 1 are removed. If False, no filtering is applied.
+
+    cnr : int, optional
+        Filter based on the carrier to noise ratio.
+        If None, no filtering is applied. If a cnr value is given,
+        all data smaller than the cnr is removed.
+
+    Returns
+    -------
+    object : object
+        This class returns an object containing the
+        wind components (.comp_u, .comp_v and .comp_w),
+        the wind speed (.hor_wind_speed) and
+        direction (.hor_wind_dir).
+
+    """
+
+    def __init__(self, data: xr.Dataset, status_filter=True, cnr=None):
+        self.logger = logging.getLogger(
+            "lidarwind.wind_prop_retrieval.GetWindPropertiesNBeam"
         )
-        comp_uw = self.comp_uw.reindex(
-            time=self.comp_ue.time, method="Nearest", tolerance=self.tolerance
+        self.logger.info("creating an instance of GetWindPropertiesNBeam")
+
+        if not isinstance(data, xr.Dataset):
+            self.logger.error("wrong data type: expecting a xr.Dataset")
+            raise TypeError
+
+        radial_wind_speed = data.radial_wind_speed
+
+        if status_filter:
+            radial_wind_speed = radial_wind_speed.where(
+                data.radial_wind_speed_status == 1
+            )
+
+        if cnr is not None:
+            radial_wind_speed = radial_wind_speed.where(data.cnr >= cnr)
+
+        self.rad_wind_speed = radial_wind_speed.transpose(
+            "time", "gate_index"
+        ).values
+
+        self.elevation = data.elevation.round(1).values
+        azimuth = data.azimuth.round(1).values
+        self.azimuth = np.where(azimuth == 360, 0, azimuth)
+        self.scan_mean_time = data.scan_mean_time.values
+
+        # as in GetWindProperties5Beam, the gates are identified by
+        # the height of the vertical beam, if there is one
+        vertical = np.flatnonzero(self.elevation == 90)
+        first_ray = vertical[0] if vertical.size else 0
+        self.range_val = data.measurement_height.isel(time=first_ray)
+
+        self.calc_wind_comp()
+        self.calc_hor_wind_speed()
+        self.calc_hor_wind_dir()
+
+    def solve_pattern(self, pattern: tuple, rad_wind_speed):
+        """
+        It fits the wind components of the scans of one pattern,
+        given their radial velocities as a (scan, beam, gate)
+        array. The scans and gates are grouped by their valid
+        beams, and each group is solved with the pseudo-inverse
+        of those beams only. It returns a (scan, 3, gate) array.
+        """
+
+        n_scans, n_beams, n_gates = rad_wind_speed.shape
+
+        # one row of beams for each scan and gate
+        rad_wind_speed = rad_wind_speed.transpose(0, 2, 1).reshape(-1, n_beams)
+        masks, group = np.unique(
+            np.isfinite(rad_wind_speed), axis=0, return_inverse=True
         )
+        group = group.ravel()
 
-        self.comp_v = self.comp_vn - comp_vs
-        self.comp_u = self.comp_ue - comp_uw
+        wind_comp = np.full((rad_wind_speed.shape[0], 3), np.nan)
 
-        self.comp_v.name = "comp_v"
-        self.comp_u.name = "comp_u"
+        for i, mask in enumerate(masks):
+
+            if mask.sum() < 3:
+                continue
+
+            # cached for each set of beams, see lidarwind.geometry
+            azimuth, elevation = np.array(pattern, dtype=float)[mask].T
+            pseudo_inverse = geometry.dbs_pseudo_inverse(azimuth, elevation)
+
+            if pseudo_inverse is None:
+                self.logger.warning(
+                    f"the beams {list(zip(azimuth, elevation))} "
+                    "do not constrain u, v and w"
+                )
+                continue
+
+            rows = group == i
+            wind_comp[rows] = rad_wind_speed[rows][:, mask] @ pseudo_inverse.T
 
-        self.comp_v = self.correct_wind_comp(self.comp_v)
-        self.comp_u = self.correct_wind_comp(self.comp_u)
+        return wind_comp.reshape(n_scans, n_gates, 3).transpose(0, 2, 1)
 
-        self.comp_u = self.comp_u.reindex(
-            time=self.comp_v.time, method="Nearest", tolerance=self.tolerance
+    def calc_wind_comp(self):
+        """
+        This method fits the u, v and w components
+        for all scans and range gates.
+        """
+
+        self.logger.info("calculating the wind components from N beams")
+
+        order = np.lexsort((self.azimuth, self.elevation, self.scan_mean_time))
+        azimuth = self.azimuth[order]
+        elevation = self.elevation[order]
+        rad_wind_speed = self.rad_wind_speed[order]
+
+        scan_time, scan_start, scan_size = np.unique(
+            self.scan_mean_time[order], return_index=True, return_counts=True
         )
 
+        patterns = {}
+        for scan, (start, size) in enumerate(zip(scan_start, scan_size)):
+            pattern = tuple(
+                zip(
+                    azimuth[start : start + size],
+                    elevation[start : start + size],
+                )
+            )
+            patterns.setdefault(pattern, []).append(scan)
+
+        wind_comp = np.full(
+            (scan_time.size, 3, rad_wind_speed.shape[1]), np.nan
+        )
+
+        for pattern, scans in patterns.items():
+
+            rays = scan_start[scans, np.newaxis] + np.arange(len(pattern))
+            wind_comp[scans] = self.solve_pattern(
+                pattern, rad_wind_speed[rays]
+            )
+
+        for i, name in enumerate(["comp_u", "comp_v", "comp_w"]):
+
+            comp = xr.DataArray(
+                wind_comp[:, i],
+                dims=("time", "range"),
+                coords={"time": scan_time, "range": self.range_val.values},
+                name=name,
+            )
+            comp.range.attrs = self.range_val.attrs
+
+            setattr(self, name, comp)
+
         return self
 
     def calc_hor_wind_speed(self):
@@ -511,30 +802,19 @@ class GetWindProperties5Beam:
             "calculating the horizontal wind speed using DBS observations"
         )
 
-        hor_wind_speed = np.sqrt(self.comp_v**2.0 + self.comp_u**2.0)
-        hor_wind_speed.name = "hor_wind_speed"
-        hor_wind_speed.attrs["long_name"] = "wind_speed"
-        hor_wind_speed.attrs["units"] = "m/s"
-
-        self.hor_wind_speed = hor_wind_speed
+        self.hor_wind_speed = hor_wind_speed(self.comp_u, self.comp_v)
 
         return self
 
     def calc_hor_wind_dir(self):
         """
-        Function to derive wind direction. If folows the same
-        approach used by the lidar sftware.
+        Function to derive wind direction. It follows the same
+        approach used by the lidar software.
         """
 
         self.logger.info("retrieving the wind direction using DBS observation")
 
-        wind_dir = 180 + np.rad2deg(np.arctan2(self.comp_u, self.comp_v))
-
-        wind_dir.name = "hor_wind_dir"
-        wind_dir.attrs["long_name"] = "wind_direction"
-        wind_dir.attrs["units"] = "deg"
-
-        self.hor_wind_dir = wind_dir
+        self.hor_wind_dir = hor_wind_dir(self.comp_u, self.comp_v)
 
         return self
 
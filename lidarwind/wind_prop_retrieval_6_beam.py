@@ -2,11 +2,14 @@
 
 """
 import logging
+import os
 
 import numpy as np
 import xarray as xr
 
+from . import geometry
 from .data_operator import GetRestructuredData
+from .utilities import rolling_variance
 
 module_logger = logging.getLogger("lidarwind.wind_prop_retrieval_6_beam")
 module_logger.debug("loading wind_prop_retrieval_6_beam")
@@ -36,6 +39,11 @@ class SixBeamMethod:
         number of profiles used to calculate
         the variance
 
+    chunk_size : int, optional
+        if given, the variances are calculated in chunks of
+        this number of profiles, see utilities.rolling_variance.
+        It bounds the memory used for long periods.
+
     Returns
     -------
     var_comp_ds : xarray.DataSet
@@ -44,7 +52,7 @@ class SixBeamMethod:
 
     """
 
-    def __init__(self, data, freq=10, freq90=10):
+    def __init__(self, data, freq=10, freq90=10, chunk_size=None):
 
         self.logger = logging.getLogger(
             "lidarwind.wind_prop_retrieval_6_beam.SixBeamMethod"
@@ -59,6 +67,7 @@ class SixBeamMethod:
 
         self.elv = data.data_transf.elv.values
         self.azm = data.data_transf.azm.values
+        self.chunk_size = chunk_size
 
         self.get_m_matrix()
         self.get_m_matrix_inv()
@@ -69,6 +78,18 @@ class SixBeamMethod:
         self.get_sigma()
         self.get_variance_ds()
 
+    def beam_pattern(self):
+
+        """
+        It returns the azimuths and elevations of the beams,
+        the slanted beams followed by the vertical beam.
+        """
+
+        phis = np.append(np.ones_like(self.azm) * self.elv, np.array([90]))
+        thetas = np.append(self.azm, np.array([0]))
+
+        return thetas, phis
+
     def get_m_matrix(self):
 
         """
@@ -83,36 +104,15 @@ class SixBeamMethod:
 
 
         M x SIGMA = S
-        """
-
-        phis = np.append(np.ones_like(self.azm) * self.elv, np.array([90]))
-        phis_rad = np.deg2rad(phis)
-
-        thetas = np.append(self.azm, np.array([0]))
-        thetas_rad = np.deg2rad(thetas)
-
-        m_matrix = np.ones((len(phis), len(thetas))) * np.nan
-
-        for i, theta in enumerate(thetas_rad):
-
-            phi = phis_rad[i]
-
-            ci1 = np.cos(phi) ** 2 * np.sin(theta) ** 2
-            ci2 = np.cos(phi) ** 2 * np.cos(theta) ** 2
 
-            ci3 = np.sin(phi) ** 2
-            ci4 = np.cos(phi) ** 2 * np.cos(theta) * np.sin(theta)
-
-            ci5 = np.cos(phi) * np.sin(phi) * np.sin(theta)
-            ci6 = np.cos(phi) * np.sin(phi) * np.cos(theta)
-
-            m_matrix_line = np.array(
-                [ci1, ci2, ci3, ci4 * 2, ci5 * 2, ci6 * 2]
-            )
+        The matrix is cached for each scan pattern, see
+        lidarwind.geometry.six_beam_m_matrix. A copy is kept,
+        so it can be modified without changing the cache.
+        """
 
-            m_matrix[i] = m_matrix_line
+        thetas, phis = self.beam_pattern()
 
-        self.m_matrix = m_matrix
+        self.m_matrix = geometry.six_beam_m_matrix(thetas, phis).copy()
 
         return self
 
@@ -120,9 +120,12 @@ class SixBeamMethod:
 
         """
         This method calculates the inverse matrix of M.
+        It is also cached for each scan pattern and copied.
         """
 
-        self.m_matrix_inv = np.linalg.inv(self.m_matrix)
+        thetas, phis = self.beam_pattern()
+
+        self.m_matrix_inv = geometry.six_beam_m_matrix_inv(thetas, phis).copy()
 
         return self
 
@@ -140,12 +143,14 @@ class SixBeamMethod:
 
         return self
 
-    def get_variance(self, data, freq=10, name="rVariance"):
+    def get_variance(self, data, freq=10, name="rVariance", chunk_size=None):
 
         """
         This method calculates the variance from the
         observed radial velocities within a time window.
         The default size of this window is 10 minutes.
+        The variance is calculated from cumulative sums, so
+        its cost does not depend on the window size.
 
         Parameters
         ----------
@@ -156,11 +161,25 @@ class SixBeamMethod:
             number of profiles used to calculate
             the variance
 
+        chunk_size : int, optional
+            number of profiles processed at once. If None,
+            the chunk size of the instance is used.
+
         """
 
-        variance = data.rolling(
-            time=freq, center=True, min_periods=int(freq * 0.3)
-        ).var()
+        if chunk_size is None:
+            chunk_size = self.chunk_size
+
+        variance = data.copy(
+            data=rolling_variance(
+                data.values,
+                freq,
+                min_periods=int(freq * 0.3),
+                center=True,
+                axis=data.get_axis_num("time"),
+                chunk_size=chunk_size,
+            )
+        )
 
         self.radial_variances[name] = variance
 
@@ -172,16 +191,22 @@ class SixBeamMethod:
 
         """
         This method fills the observation variance matrix (S).
+        It is stored as a contiguous (6, time, range) array,
+        with the slanted azimuths followed by the vertical beam,
+        in the same order as the lines of M.
         """
 
-        s_matrix = np.dstack(
-            (
-                self.radial_variances["rVariance"].values,
-                self.radial_variances["rVariance90"].values[
-                    :, :, np.newaxis, np.newaxis
-                ],
-            )
+        variance = (
+            self.radial_variances["rVariance"]
+            .squeeze("elv", drop=True)
+            .transpose("azm", "time", "range")
+            .values
         )
+        variance90 = self.radial_variances["rVariance90"].values
+
+        s_matrix = np.empty((variance.shape[0] + 1,) + variance90.shape)
+        s_matrix[:-1] = variance
+        s_matrix[-1] = variance90
 
         self.s_matrix = s_matrix
 
@@ -192,9 +217,16 @@ class SixBeamMethod:
         Reynolds stress tensor (SIGMA).
 
         SIGMA = M^-1 x S
+
+        All profiles are solved at once, without inverting M,
+        with the profiles as the columns of the right-hand side.
         """
 
-        self.sigma_matrix = np.matmul(self.m_matrix_inv, self.s_matrix)
+        sigma_matrix = np.linalg.solve(
+            self.m_matrix, self.s_matrix.reshape(len(self.m_matrix), -1)
+        )
+
+        self.sigma_matrix = sigma_matrix.reshape(self.s_matrix.shape)
 
         return self
 
@@ -204,21 +236,124 @@ class SixBeamMethod:
         This method converts the SIGMA into a xarray dataset.
         """
 
-        var_comp_ds = xr.Dataset()
         var_comp_name = ["u", "v", "w", "uv", "uw", "vw"]
 
-        for i, var_comp in enumerate(var_comp_name):
+        self.var_comp_ds = xr.Dataset(
+            {
+                f"var_{var_comp}": (("time", "range"), self.sigma_matrix[i])
+                for i, var_comp in enumerate(var_comp_name)
+            },
+            coords={
+                "time": self.radial_variances["rVariance90"].time,
+                "range": self.radial_variances["rVariance"].range,
+            },
+        )
 
-            tmp_data = xr.DataArray(
-                self.sigma_matrix[:, :, i, 0],
-                dims=("time", "range"),
-                coords={
-                    "time": self.radial_variances["rVariance90"].time,
-                    "range": self.radial_variances["rVariance"].range,
-                },
-                name=f"var_{var_comp}",
-            )
 
-            var_comp_ds = xr.merge([var_comp_ds, tmp_data])
+def six_beam_method_to_store(
+    data: xr.Dataset,
+    store_path: str,
+    block_size: int = 1000,
+    freq=10,
+    freq90=10,
+    **kwargs,
+):
+
+    """Chunked 6 beam method
+
+    It applies the 6 beam method to consecutive time blocks
+    of a merged dataset, so that only one block is loaded at
+    a time. Each block is extended by an overlap of one
+    variance window on both sides, which is removed after
+    the retrieval. The results are written as NetCDF parts
+    into a store directory, which are then opened lazily.
+    The result is the same as applying SixBeamMethod to the
+    whole dataset, unless a beam is missing for longer than
+    the overlap.
+
+    Examples
+    --------
+    >>> merged_ds = lidarwind.DataOperations(file_list, lazy=True).merged_data
+    >>> var_comp_ds = lidarwind.six_beam_method_to_store(
+    ...     merged_ds, store_path, freq=freq, freq90=freq
+    ... )
+
+    Parameters
+    ----------
+    data : xr.Dataset
+        a xr.Dataset of pre-processed data, e.g. the merged
+        data from DataOperations. It can be lazily loaded.
+
+    store_path : str
+        Directory where the NetCDF parts are written
+
+    block_size : int
+        number of vertical profiles retrieved in each block
+
+    freq : int
+        number of profiles used to calculate
+        the variance
+
+    freq90 : int
+        number of profiles used to calculate
+        the variance
+
+    **kwargs
+        passed to GetRestructuredData, e.g. snr and status
+
+    Returns
+    -------
+    var_comp_ds : xarray.DataSet
+        a lazily opened dataset of the Reynolds stress tensor
+        matrix elements
+
+    """
+
+    if not isinstance(data, xr.Dataset):
+        raise TypeError(f"{data} is not an xr.Dataset")
+
+    if block_size < 1:
+        raise ValueError("block_size must be a positive integer")
+
+    os.makedirs(store_path, exist_ok=True)
+
+    vertical = np.flatnonzero(data["elevation"].values == 90)
+
+    if vertical.size == 0:
+        raise ValueError("data has no vertical observations")
+
+    overlap = max(freq, freq90)
+
+    parts = []
+
+    for start in range(0, vertical.size, block_size):
+
+        stop = min(start + block_size, vertical.size)
+        block_start = max(start - overlap, 0)
+        block_stop = min(stop + overlap, vertical.size)
+
+        # the slanted rays before the first and after the last
+        # vertical profile are kept, as in the full retrieval
+        first = vertical[block_start] if block_start > 0 else 0
+        last = (
+            vertical[block_stop - 1] + 1
+            if block_stop < vertical.size
+            else data.sizes["time"]
+        )
+
+        block = data.isel(time=slice(first, last)).load()
+
+        var_comp_ds = SixBeamMethod(
+            GetRestructuredData(block, **kwargs), freq=freq, freq90=freq90
+        ).var_comp_ds
+        var_comp_ds = var_comp_ds.isel(
+            time=slice(start - block_start, stop - block_start)
+        )
+
+        part_name = os.path.join(store_path, f"part_{len(parts):06d}.nc")
+        var_comp_ds.to_netcdf(part_name)
+        parts.append(part_name)
+
+        del block, var_comp_ds
 
-        self.var_comp_ds = var_comp_ds
+    return xr.open_mfdataset(parts, combine="nested", concat_dim="time")
@@ -1,6 +1,13 @@
 import numpy as np
 import xarray as xr
-import xrft
+
+from .. import geometry
+
+
+def _first_harmonic(values, cos_kernel, sin_kernel):
+    """Single bin discrete Fourier transform along the last axis"""
+
+    return values @ cos_kernel - 1j * (values @ sin_kernel)
 
 
 def first_harmonic_amplitude(
@@ -8,9 +15,12 @@ def first_harmonic_amplitude(
 ) -> xr.DataArray:
     """First harmonic amplitude
 
-    This function calculates the complex amplitudes
-    along the azimuth coordinate and returns
-    the amplitude of the first harmonic.
+    This function calculates the complex amplitude
+    of the first harmonic along the azimuth coordinate.
+    Only the first Fourier coefficient is computed, as
+    a dot product with the first harmonic kernel. The
+    phase is referenced to the azimuth values, as in
+    xrft.fft with true_phase=True.
 
     Parameters
     ----------
@@ -26,26 +36,40 @@ def first_harmonic_amplitude(
 
     """
 
-    complex_amplitudes = xrft.fft(
-        radial_velocity, dim=dim, true_amplitude=False
+    azimuth = radial_velocity[dim].values
+    spacing = np.diff(azimuth)
+
+    if spacing.size == 0 or not np.allclose(spacing, spacing[0]):
+        raise ValueError(f"{dim} coordinate must be evenly spaced")
+
+    frequency, cos_kernel, sin_kernel = geometry.first_harmonic_kernel(azimuth)
+
+    complex_amplitudes = xr.apply_ufunc(
+        _first_harmonic,
+        radial_velocity,
+        xr.DataArray(cos_kernel, dims=dim),
+        xr.DataArray(sin_kernel, dims=dim),
+        input_core_dims=[[dim], [dim], [dim]],
+        dask="parallelized",
+        output_dtypes=[np.complex128],
     )
+
     complex_amplitudes = complex_amplitudes.assign_coords(
-        {f"{dim}_length": len(radial_velocity[dim])}
+        {
+            f"freq_{dim}": frequency,
+            f"{dim}_length": azimuth.size,
+        }
     )
 
+    complex_amplitudes[f"freq_{dim}"].attrs = {
+        "spacing": frequency,
+        "direct_lag": np.sort(azimuth)[azimuth.size // 2],
+    }
     complex_amplitudes[f"{dim}_length"].attrs = {
         "comment": "size of the azimuth coordinate"
     }
 
-    # determination of the first harmonic position
-    # harmonic_index = int(radial_velocity[dim].size / 2) + 1
-    first_harmonic_index = (
-        complex_amplitudes[f"freq_{dim}"]
-        .where(complex_amplitudes[f"freq_{dim}"] > 0)
-        .argmin()
-    )
-
-    return complex_amplitudes.isel({f"freq_{dim}": first_harmonic_index})
+    return complex_amplitudes
 
 
 def harmonic_phase(amplitude: xr.DataArray) -> xr.DataArray:
@@ -69,6 +93,51 @@ def harmonic_phase(amplitude: xr.DataArray) -> xr.DataArray:
     return phase
 
 
+def _wind_attrs(method="FFT"):
+    """It returns the attributes of the wind products"""
+
+    return {
+        "horizontal_wind_direction": {
+            "name": "wind direction",
+            "units": "deg",
+            "comments": "horizontal wind direction retrieved "
+            f"using the {method} method with respect to true north",
+            "info": "0=wind coming from the north, "
+            "90=east, 180=south, 270=west",
+        },
+        "horizontal_wind_speed": {
+            "name": "wind speed",
+            "units": "m s-1",
+            "comments": "horizontal wind speed retrieved "
+            f"using the {method} method",
+        },
+        "meridional_wind": {
+            "name": "meridional wind",
+            "units": "m s-1",
+            "comments": f"meridional wind retrieved using the {method} method",
+        },
+        "zonal_wind": {
+            "name": "zonal wind",
+            "units": "m s-1",
+            "comments": f"zonal wind retrieved using the {method} method",
+        },
+    }
+
+
+def _horizontal_wind_factor(
+    amplitude: xr.DataArray, elevation_name="elevation", azimuth_name="azimuth"
+) -> xr.DataArray:
+    """
+    It returns the factor converting the first harmonic
+    amplitude into the horizontal wind.
+    """
+
+    return 2 / (
+        amplitude[f"{azimuth_name}_length"]
+        * np.cos(np.deg2rad(amplitude[elevation_name]))
+    )
+
+
 def wind_direction(amplitude: xr.DataArray) -> xr.DataArray:
     """wind direction
 
@@ -86,15 +155,7 @@ def wind_direction(amplitude: xr.DataArray) -> xr.DataArray:
     """
 
     wind_direction = -harmonic_phase(amplitude) + 180
-
-    wind_direction.attrs = {
-        "name": "wind direction",
-        "units": "deg",
-        "comments": "horizontal wind direction retrived "
-        "using the FFT method with respect to true north",
-        "info": "0=wind coming from the north, "
-        "90=east, 180=south, 270=west",
-    }
+    wind_direction.attrs = _wind_attrs()["horizontal_wind_direction"]
 
     return wind_direction
 
@@ -121,18 +182,10 @@ def wind_speed(
 
     """
 
-    radial_wind_speed = (
-        2 * np.abs(amplitude) / amplitude[f"{azimuth_name}_length"]
-    )
-    horizontal_wind_speed = radial_wind_speed / np.cos(
-        np.deg2rad(amplitude[coord])
+    horizontal_wind_speed = np.abs(amplitude) * _horizontal_wind_factor(
+        amplitude, coord, azimuth_name
     )
-
-    horizontal_wind_speed.attrs = {
-        "name": "wind speed",
-        "units": "m s-1",
-        "comments": "horizontal wind speed retrived using the FFT method",
-    }
+    horizontal_wind_speed.attrs = _wind_attrs()["horizontal_wind_speed"]
 
     return horizontal_wind_speed
 
@@ -195,18 +248,11 @@ def zonal_wind(
 
     """
 
-    zonal_wind = (
-        wind_projected_to_azimuth(
-            amplitude, 90, coord=elevation_name, azimuth_name=azimuth_name
-        )
-        * -1
+    # the projection on 90 degrees, with the opposite sign
+    zonal_wind = amplitude.imag * _horizontal_wind_factor(
+        amplitude, elevation_name, azimuth_name
     )
-
-    zonal_wind.attrs = {
-        "name": "zonal wind",
-        "units": "m s-1",
-        "comments": "zonal wind retrieved using the FFT method",
-    }
+    zonal_wind.attrs = _wind_attrs()["zonal_wind"]
 
     return zonal_wind
 
@@ -229,26 +275,113 @@ def meridional_wind(
 
     """
 
-    meridional_wind = (
-        wind_projected_to_azimuth(
-            amplitude, 0, coord=elevation_name, azimuth_name=azimuth_name
-        )
-        * -1
+    # the projection on 0 degrees, with the opposite sign
+    meridional_wind = amplitude.real * _horizontal_wind_factor(
+        amplitude, elevation_name, azimuth_name
     )
-
-    meridional_wind.attrs = {
-        "name": "meridional wind",
-        "units": "m s-1",
-        "comments": "meridional wind retrieved using the FFT method",
-    }
+    meridional_wind.attrs = _wind_attrs()["meridional_wind"]
 
     return meridional_wind
 
 
+def wind_properties_from_amplitude(
+    amplitude: xr.DataArray,
+    elevation_name="elevation",
+    azimuth_name="azimuth",
+    out=None,
+    method="FFT",
+) -> xr.Dataset:
+    """Wind dataset from the first harmonic
+
+    It derives the wind direction, speed, meridional and
+    zonal components in a single pass. The magnitude, the
+    phase and the elevation correction are calculated only
+    once and shared by all outputs.
+
+    Parameters
+    ----------
+    amplitude : xr.DataArray
+        A data array of complex amplitudes from the first harmonic
+
+    elevation_name : string
+        Name of the elevation coordinate
+
+    azimuth_name : string
+        Name of the azimuthal dimension
+
+    out : xr.Dataset, optional
+        A dataset returned by a previous call with the same
+        shape. If given, the results are written into its
+        arrays instead of allocating new ones, and its
+        coordinates are replaced by those of the amplitude.
+
+    method : string
+        Name of the retrieval method written in the attributes
+
+    Returns
+    -------
+        A dataset containing the wind speed, direction, meridional
+        and zonal components
+
+    """
+
+    factor = _horizontal_wind_factor(amplitude, elevation_name, azimuth_name)
+    factor = factor.broadcast_like(amplitude).transpose(*amplitude.dims).data
+
+    real = amplitude.data.real
+    imag = amplitude.data.imag
+
+    if out is None:
+        wind_properties = xr.Dataset(
+            {
+                "horizontal_wind_direction": (
+                    amplitude.dims,
+                    180 - np.rad2deg(np.arctan2(imag, real)),
+                ),
+                "horizontal_wind_speed": (
+                    amplitude.dims,
+                    factor * np.abs(amplitude.data),
+                ),
+                "meridional_wind": (amplitude.dims, factor * real),
+                "zonal_wind": (amplitude.dims, factor * imag),
+            },
+            coords=amplitude.coords,
+        )
+
+    else:
+        for name in _wind_attrs():
+            if out[name].dims != amplitude.dims:
+                raise ValueError(f"{name} from out does not match the data")
+
+        # the new data may come from another time or elevation
+        wind_properties = out
+        wind_properties.coords.update(amplitude.coords)
+
+        direction = wind_properties["horizontal_wind_direction"].values
+        np.arctan2(imag, real, out=direction)
+        np.rad2deg(direction, out=direction)
+        np.subtract(180, direction, out=direction)
+
+        speed = wind_properties["horizontal_wind_speed"].values
+        np.abs(amplitude.data, out=speed)
+        np.multiply(speed, factor, out=speed)
+
+        np.multiply(
+            real, factor, out=wind_properties["meridional_wind"].values
+        )
+        np.multiply(imag, factor, out=wind_properties["zonal_wind"].values)
+
+    for name, attrs in _wind_attrs(method).items():
+        wind_properties[name].attrs = attrs
+
+    return wind_properties
+
+
 def get_wind_properties(
     radial_velocity: xr.DataArray,
     elevation_name="elevation",
     azimuth_name="azimuth",
+    out=None,
 ) -> xr.Dataset:
     """Wind dataset
 
@@ -259,6 +392,10 @@ def get_wind_properties(
     radial_velocities : xr.DataArray
         A data array of the slanted Doppler velocities observations.
 
+    out : xr.Dataset, optional
+        A preallocated wind dataset, see
+        wind_properties_from_amplitude
+
     Returns
     -------
         A dataset containing the wind speed, direction, meridional
@@ -268,16 +405,9 @@ def get_wind_properties(
 
     amplitude = first_harmonic_amplitude(radial_velocity, dim=azimuth_name)
 
-    wind_properties = xr.Dataset()
-    wind_properties["horizontal_wind_direction"] = wind_direction(amplitude)
-    wind_properties["horizontal_wind_speed"] = wind_speed(
-        amplitude, coord=elevation_name, azimuth_name=azimuth_name
+    return wind_properties_from_amplitude(
+        amplitude,
+        elevation_name=elevation_name,
+        azimuth_name=azimuth_name,
+        out=out,
     )
-    wind_properties["meridional_wind"] = meridional_wind(
-        amplitude, elevation_name=elevation_name, azimuth_name=azimuth_name
-    )
-    wind_properties["zonal_wind"] = zonal_wind(
-        amplitude, elevation_name=elevation_name, azimuth_name=azimuth_name
-    )
-
-    return wind_properties
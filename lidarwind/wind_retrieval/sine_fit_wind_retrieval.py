@@ -0,0 +1,147 @@
+import numpy as np
+import xarray as xr
+
+from .fft_wind_retrieval import wind_properties_from_amplitude
+
+
+def _sine_fit(values, azimuth, min_samples, max_condition):
+    """Batched least-squares fit of the first harmonic
+
+    It fits v = a + b cos(azimuth) + c sin(azimuth) along
+    the last axis of values, ignoring NaNs, by solving the
+    3x3 normal equations of all profiles at once.
+    """
+
+    shape = values.shape[:-1]
+    values = values.reshape(-1, values.shape[-1])
+
+    theta = np.deg2rad(azimuth)
+    basis = np.stack([np.ones_like(theta), np.cos(theta), np.sin(theta)], -1)
+
+    valid = np.isfinite(values)
+    weights = valid.astype(float)
+
+    normal = weights @ (basis[:, :, None] * basis[:, None, :]).reshape(-1, 9)
+    normal = normal.reshape(-1, 3, 3)
+    rhs = np.where(valid, values, 0) @ basis
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        solvable = (weights.sum(axis=-1) >= min_samples) & (
+            np.linalg.cond(normal) < max_condition
+        )
+
+    normal[~solvable] = np.eye(3)
+    coefficients = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    coefficients[~solvable] = np.nan
+
+    # same scaling as the first Fourier coefficient of azimuth.size samples
+    amplitude = (
+        azimuth.size / 2 * (coefficients[:, 1] - 1j * coefficients[:, 2])
+    )
+
+    return amplitude.reshape(shape)
+
+
+def first_harmonic_amplitude(
+    radial_velocity: xr.DataArray,
+    dim="azimuth",
+    min_samples=3,
+    max_condition=1e8,
+) -> xr.DataArray:
+    """First harmonic amplitude from a sine fit
+
+    This function fits a sine wave (VAD) to the radial
+    velocities along the azimuth coordinate and returns
+    the complex amplitude of the first harmonic. The
+    azimuths do not need to be regularly spaced and NaNs
+    are ignored, so no interpolation or gap filling is
+    needed. The amplitude is scaled as the first Fourier
+    coefficient, so that it can be used with the functions
+    from fft_wind_retrieval.
+
+    Parameters
+    ----------
+    radial_velocity : xr.DataArray
+        A data array of slanted Doppler velocities
+
+    dim : string
+        Name of the azimuthal dimension
+
+    min_samples : int
+        Minimum number of valid azimuths for fitting a profile
+
+    max_condition : float
+        Maximum condition number of the normal equations.
+        Profiles with a worse conditioned fit, e.g. when all
+        valid azimuths are clustered, are set to NaN.
+
+    Returns
+    -------
+        A data array of the amplitudes of the first harmonic
+
+    """
+
+    if not isinstance(radial_velocity, xr.DataArray):
+        raise TypeError(f"{radial_velocity} is not an xr.DataArray")
+
+    azimuth = radial_velocity[dim].values
+
+    complex_amplitudes = xr.apply_ufunc(
+        _sine_fit,
+        radial_velocity,
+        input_core_dims=[[dim]],
+        kwargs={
+            "azimuth": azimuth,
+            "min_samples": max(min_samples, 3),
+            "max_condition": max_condition,
+        },
+        dask="parallelized",
+        output_dtypes=[np.complex128],
+    )
+
+    complex_amplitudes = complex_amplitudes.assign_coords(
+        {f"{dim}_length": azimuth.size}
+    )
+    complex_amplitudes[f"{dim}_length"].attrs = {
+        "comment": "size of the azimuth coordinate"
+    }
+
+    return complex_amplitudes
+
+
+def get_wind_properties(
+    radial_velocity: xr.DataArray,
+    elevation_name="elevation",
+    azimuth_name="azimuth",
+    out=None,
+) -> xr.Dataset:
+    """Wind dataset
+
+    It retrieves the wind properties from the slanted
+    observations using the sine fit.
+
+    Parameters
+    ----------
+    radial_velocities : xr.DataArray
+        A data array of the slanted Doppler velocities observations.
+
+    out : xr.Dataset, optional
+        A preallocated wind dataset, see
+        fft_wind_retrieval.wind_properties_from_amplitude
+
+    Returns
+    -------
+        A dataset containing the wind speed, direction, meridional
+        and zonal components
+
+    """
+
+    amplitude = first_harmonic_amplitude(radial_velocity, dim=azimuth_name)
+
+    return wind_properties_from_amplitude(
+        amplitude,
+        elevation_name=elevation_name,
+        azimuth_name=azimuth_name,
+        out=out,
+        method="sine fit",
+    )
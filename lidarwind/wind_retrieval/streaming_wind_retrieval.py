@@ -0,0 +1,163 @@
+import numpy as np
+import xarray as xr
+
+from .. import geometry
+from .fft_wind_retrieval import _first_harmonic, wind_properties_from_amplitude
+
+
+class StreamingWindRetrieval:
+
+    """Streaming FFT wind retrieval
+
+    It retrieves the wind from a live feed of slanted rays.
+    The rays are written into a ring buffer holding one slot
+    per azimuth of the scan, so the memory does not grow with
+    the length of the feed. A wind profile is emitted every
+    time all slots were refreshed since the last profile, i.e.
+    once per complete scan cycle. The profile is the same as
+    the one from fft_wind_retrieval.get_wind_properties applied
+    to the rays in the buffer, and it is labelled with the time
+    of the ray that completed the cycle.
+
+    Examples
+    --------
+    >>> retrieval = StreamingWindRetrieval(
+    ...     azimuth=[0, 72, 144, 216, 288], elevation=75, n_gates=200
+    ... )
+    >>> wind = retrieval.ingest(time, 144, radial_velocity)
+
+    Parameters
+    ----------
+    azimuth : list
+        evenly spaced azimuths of the scan
+
+    elevation : float
+        elevation of the slanted rays
+
+    n_gates : int
+        number of range gates of each ray
+
+    azimuth_tolerance : float
+        maximum difference in degrees between the azimuth of
+        a ray and the azimuth of its slot
+
+    """
+
+    def __init__(self, azimuth, elevation, n_gates, azimuth_tolerance=0.5):
+
+        azimuth = np.sort(np.asarray(azimuth, dtype=float))
+        spacing = np.diff(azimuth)
+
+        if spacing.size == 0 or not np.allclose(spacing, spacing[0]):
+            raise ValueError("azimuth must be evenly spaced")
+
+        self.azimuth = azimuth
+        self.elevation = elevation
+        self.n_gates = n_gates
+        self.azimuth_tolerance = azimuth_tolerance
+
+        frequency, cos_kernel, sin_kernel = geometry.first_harmonic_kernel(
+            azimuth
+        )
+        self.cos_kernel = cos_kernel
+        self.sin_kernel = sin_kernel
+
+        self.coords = {
+            "elevation": elevation,
+            "freq_azimuth": frequency,
+            "azimuth_length": azimuth.size,
+        }
+
+        self.buffer = np.full((n_gates, azimuth.size), np.nan)
+        self.refreshed = np.zeros(azimuth.size, dtype=bool)
+
+    def slot(self, azimuth: float):
+        """
+        It returns the buffer slot of a given azimuth,
+        or None if it is not part of the scan.
+        """
+
+        distance = np.abs((self.azimuth - azimuth + 180) % 360 - 180)
+        index = np.argmin(distance)
+
+        if distance[index] > self.azimuth_tolerance:
+            return None
+
+        return index
+
+    def ingest(self, time, azimuth: float, radial_velocity):
+        """
+        It writes a ray into the buffer and returns a wind
+        profile if the ray completes a scan cycle, otherwise
+        None. Rays from other azimuths are ignored.
+        """
+
+        radial_velocity = np.asarray(radial_velocity, dtype=float)
+
+        if radial_velocity.shape != (self.n_gates,):
+            raise ValueError(
+                f"radial_velocity must have {self.n_gates} range gates"
+            )
+
+        index = self.slot(azimuth)
+
+        if index is None:
+            return None
+
+        self.buffer[:, index] = radial_velocity
+        self.refreshed[index] = True
+
+        if not self.refreshed.all():
+            return None
+
+        self.refreshed[:] = False
+
+        return self.retrieve(time)
+
+    def retrieve(self, time):
+        """
+        It retrieves the wind profile from the current buffer.
+        """
+
+        amplitude = xr.DataArray(
+            _first_harmonic(self.buffer, self.cos_kernel, self.sin_kernel),
+            dims="gate_index",
+            coords={"time": time, **self.coords},
+        )
+
+        return wind_properties_from_amplitude(amplitude)
+
+    def ingest_dataset(self, ds: xr.Dataset):
+        """
+        It ingests the rays of a dataset, e.g. a restructured
+        and corrected fixed file, in time order and returns the
+        emitted profiles concatenated along time, or None if no
+        scan cycle was completed. Rays from other elevations,
+        such as the vertical ones, are ignored.
+        """
+
+        if not isinstance(ds, xr.Dataset):
+            raise TypeError(f"{ds} is not an xr.Dataset")
+
+        ds = ds.sortby("time")
+        slanted = np.flatnonzero(
+            np.isclose(ds["elevation"].values, self.elevation)
+        )
+
+        radial_velocity = (
+            ds["radial_wind_speed"].transpose("time", "gate_index").values
+        )
+        time = ds["time"].values
+        azimuth = ds["azimuth"].values
+
+        profiles = []
+        for i in slanted:
+            profile = self.ingest(time[i], azimuth[i], radial_velocity[i])
+
+            if profile is not None:
+                profiles.append(profile)
+
+        if not profiles:
+            return None
+
+        return xr.concat(profiles, dim="time")
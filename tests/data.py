@@ -3,8 +3,12 @@ import os
 import shutil
 from typing import Optional
 
+import datatree
 import gdown
+import numpy as np
+import pandas as pd
 import pytest
+import xarray as xr
 
 from lidarwind.io import open_sweep
 
@@ -90,3 +94,70 @@ def sample_dataset(key: str):
 
     ds = open_sweep(path)
     return ds
+
+
+def synthetic_sweep(
+    start="2021-05-13 12:00:00",
+    azimuth=0,
+    elevation=75,
+    n_gates=4,
+    step=1.0,
+    wind=None,
+):
+    """Windcube-like sweep for testing
+
+    It mimics the group stored in the original Windcube NetCDF files,
+    i.e. before being decoded by open_sweep. One ray is created for
+    each azimuth given. If wind is None, the radial velocities are
+    random.
+    """
+    azimuth = np.atleast_1d(np.asarray(azimuth, dtype=float))
+    n_rays = len(azimuth)
+    elevation = np.ones(n_rays) * elevation
+
+    if wind is None:
+        rng = np.random.default_rng(int(pd.Timestamp(start).timestamp()))
+        wind = rng.normal(size=(n_rays, n_gates))
+    wind = np.ones((n_rays, n_gates)) * np.asarray(wind, dtype=float)
+
+    ranges = 100.0 + 50.0 * np.arange(n_gates)
+    height = np.sin(np.deg2rad(elevation))[:, np.newaxis] * ranges
+
+    ds = xr.Dataset(
+        {
+            "azimuth": ("time", azimuth),
+            "elevation": ("time", elevation),
+            "ray_index": ("time", np.arange(n_rays)),
+            "gate_index": ("range", np.arange(1, n_gates + 1)),
+            "radial_wind_speed": (("time", "range"), wind),
+            "radial_wind_speed_status": (
+                ("time", "range"),
+                np.ones((n_rays, n_gates)),
+            ),
+            "cnr": (("time", "range"), np.ones((n_rays, n_gates)) * -20),
+            "relative_beta": (("time", "range"), wind * 1e-6),
+            "measurement_height": (("time", "range"), height),
+            "time_reference": ((), pd.Timestamp(start).isoformat()),
+        },
+        coords={
+            "time": (
+                "time",
+                np.arange(n_rays) * step,
+                {"units": "seconds since 1970-01-01"},
+            ),
+            "range": ("range", ranges, {"units": "m"}),
+        },
+    )
+
+    return ds
+
+
+def write_sweep_file(path, ds, sweep_group_name="sweep_1"):
+    """Write a sweep in the Windcube's NetCDF group layout"""
+    root = xr.Dataset(
+        {"sweep_group_name": ("sweep", np.array([sweep_group_name]))}
+    )
+    tree = datatree.DataTree.from_dict({"/": root, f"/{sweep_group_name}": ds})
+    tree.to_netcdf(path)
+
+    return str(path)
@@ -3,6 +3,7 @@ import pytest
 import xarray as xr
 
 from lidarwind.postprocessing import post_rpg_radar
+from lidarwind.preprocessing import rpg_radar
 
 
 def get_test_ds():
@@ -22,6 +23,43 @@ def get_test_ds():
     return test_ds
 
 
+def get_synthetic_ppi(u=3, v=-4, elevation=75, n_rays=90):
+
+    rng = np.random.default_rng(0)
+
+    azimuth = np.sort(rng.uniform(0, 360, n_rays))
+    radial_velocity = (
+        u * np.sin(np.deg2rad(azimuth)) + v * np.cos(np.deg2rad(azimuth))
+    ) * np.cos(np.deg2rad(elevation))
+
+    mean_vel = np.tile(radial_velocity[:, np.newaxis], (1, 4))
+    mean_vel[rng.uniform(size=mean_vel.shape) < 0.2] = np.nan
+
+    test_ds = xr.Dataset(
+        {
+            "Time": ("Time", 6e8 + np.arange(n_rays) * 0.5),
+            "Timems": ("Time", np.zeros(n_rays)),
+            "ChirpNum": 1,
+            "C1MeanVel": (
+                ("Time", "C1Range"),
+                mean_vel,
+                {"Name": "Mean Doppler velocity Chirp 1"},
+            ),
+            "C1ZDR": (
+                ("Time", "C1Range"),
+                np.zeros_like(mean_vel),
+                {"Name": "ZDR Chirp 1"},
+            ),
+            "Azm": ("Time", azimuth),
+            "Elv": ("Time", np.full(n_rays, float(elevation))),
+            "Chirp": ("Chirp", [0]),
+        },
+        coords={"C1Range": [100.0, 200.0, 300.0, 400.0]},
+    )
+
+    return test_ds
+
+
 def test_get_horizontal_wind_ds_type():
 
     with pytest.raises(TypeError):
@@ -107,3 +145,101 @@ def test_get_horizontal_wind_mean_time():
 
     with pytest.raises(KeyError):
         post_rpg_radar.get_horizontal_wind(ds)
+
+
+def test_get_horizontal_wind_method():
+
+    with pytest.raises(ValueError):
+        post_rpg_radar.get_horizontal_wind(get_test_ds(), method="dbs")
+
+
+def test_get_horizontal_wind_sine_fit():
+
+    ds = rpg_radar.rpg_slanted_radial_velocity_4_sine_fit(get_synthetic_ppi())
+    wind_ds = post_rpg_radar.get_horizontal_wind(ds, method="sine_fit")
+
+    assert wind_ds["zonal_wind"].dims == ("mean_time", "range")
+    np.testing.assert_allclose(wind_ds["zonal_wind"], -3, atol=0.05)
+    np.testing.assert_allclose(wind_ds["meridional_wind"], -4, atol=0.05)
+
+
+@pytest.fixture
+def synthetic_ppi_files(tmp_path):
+
+    file_names = []
+
+    for scan in range(3):
+        ds = get_synthetic_ppi()
+        ds["Time"] = ds["Time"] + scan * 60
+        file_name = tmp_path / f"ppi_{scan}.nc"
+        ds.to_netcdf(file_name)
+        file_names.append(str(file_name))
+
+    return file_names
+
+
+def test_get_horizontal_wind_batch_same_as_serial(synthetic_ppi_files):
+
+    expected = xr.merge(
+        [
+            post_rpg_radar.get_horizontal_wind(
+                rpg_radar.rpg_slanted_radial_velocity_4_fft(
+                    xr.load_dataset(file_name)
+                )
+            )
+            for file_name in synthetic_ppi_files
+        ]
+    )
+
+    wind_ds = post_rpg_radar.get_horizontal_wind_batch(
+        synthetic_ppi_files[::-1], workers=2, executor="thread"
+    )
+
+    assert wind_ds["horizontal_wind_speed"].dims == ("mean_time", "range")
+    xr.testing.assert_allclose(wind_ds, expected)
+
+
+def test_get_horizontal_wind_batch_bad_file(
+    synthetic_ppi_files, tmp_path, caplog
+):
+
+    bad_file = tmp_path / "bad.nc"
+    bad_file.write_text("not a netcdf file")
+
+    with caplog.at_level("WARNING"):
+        wind_ds = post_rpg_radar.get_horizontal_wind_batch(
+            synthetic_ppi_files + [str(bad_file)], workers=1
+        )
+
+    assert wind_ds["mean_time"].size == len(synthetic_ppi_files)
+
+    # logged once, with the error
+    skipped = [
+        record.getMessage()
+        for record in caplog.records
+        if str(bad_file) in record.getMessage()
+    ]
+    assert len(skipped) == 1
+    assert "Error" in skipped[0]
+
+
+def test_get_horizontal_wind_batch_file_names():
+
+    with pytest.raises(TypeError):
+        post_rpg_radar.get_horizontal_wind_batch("ppi.nc")
+
+    with pytest.raises(ValueError):
+        post_rpg_radar.get_horizontal_wind_batch(["missing.nc"], workers=1)
+
+
+def test_get_horizontal_wind_sine_fit_azimuth_gap():
+
+    test_ds = get_synthetic_ppi()
+    gap = (test_ds["Azm"] > 60) & (test_ds["Azm"] < 180)
+    test_ds["C1MeanVel"] = test_ds["C1MeanVel"].where(~gap)
+
+    ds = rpg_radar.rpg_slanted_radial_velocity_4_sine_fit(test_ds)
+    wind_ds = post_rpg_radar.get_horizontal_wind(ds, method="sine_fit")
+
+    np.testing.assert_allclose(wind_ds["zonal_wind"], -3, atol=1e-6)
+    np.testing.assert_allclose(wind_ds["meridional_wind"], -4, atol=1e-6)
@@ -131,3 +131,47 @@ def test_wc_slanted_radial_velocity_4_fft_few_data():
         )
 
     ds.close()
+
+
+def test_wc_slanted_radial_velocity_4_fft_nearest_rays():
+
+    time = np.datetime64("2021-01-01") + np.arange(12).astype("m8[s]")
+    azm = np.tile([0, 120, 240], 4)
+
+    # the second ray of the 120 degrees azimuth is missing
+    time = np.delete(time, 4)
+    azm = np.delete(azm, 4)
+
+    ds = xr.Dataset(
+        {
+            "radial_wind_speed": (
+                ("time", "gate_index"),
+                np.arange(len(time))[:, np.newaxis] * [1.0, 10.0],
+            ),
+        },
+        coords={
+            "time": time,
+            "gate_index": [1, 2],
+            "azimuth": ("time", azm),
+            "elevation": ("time", np.full(len(time), 75)),
+        },
+    )
+
+    radial_velocities = preprocessing.wc_slanted_radial_velocity_4_fft(
+        ds.isel(time=np.random.default_rng(0).permutation(len(time)))
+    )
+    wind = radial_velocities["radial_wind_speed"]
+
+    assert wind.dims == ("azimuth", "time", "gate_index")
+    np.testing.assert_array_equal(wind["time"], time)
+    np.testing.assert_array_equal(wind["azimuth"], [0, 120, 240])
+
+    # each ray is its own nearest neighbour
+    np.testing.assert_array_equal(
+        wind.sel(azimuth=0, gate_index=1).values[[0, 3, 5, 8]], [0, 3, 5, 8]
+    )
+    # nearest 120 degrees ray within half a cycle (1.5 s)
+    np.testing.assert_array_equal(
+        wind.sel(azimuth=120, gate_index=2).values[:6],
+        [10, 10, 10, np.nan, np.nan, 60],
+    )
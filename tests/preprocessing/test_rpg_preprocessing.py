@@ -231,3 +231,9 @@ def test_rpg_slanted_radial_velocity_4_fft_ds():
 
     with pytest.raises(TypeError):
         rpg_radar.rpg_slanted_radial_velocity_4_fft(ds=np.array([0]))
+
+
+def test_rpg_slanted_radial_velocity_4_sine_fit_ds():
+
+    with pytest.raises(TypeError):
+        rpg_radar.rpg_slanted_radial_velocity_4_sine_fit(ds=np.array([1, 2]))
@@ -1,8 +1,23 @@
+import numpy as np
 import pytest
 
 import lidarwind as lst
+from lidarwind.io import open_sweep, open_sweeps
 
 from .data import data_filenames  # , get_sample_data
+from .data import synthetic_sweep, write_sweep_file
+
+
+@pytest.fixture
+def synthetic_files(tmp_path):
+
+    return [
+        write_sweep_file(
+            tmp_path / f"sweep_{i}.nc",
+            synthetic_sweep(start=f"2021-05-13 12:00:{i:02d}", azimuth=i),
+        )
+        for i in range(4)
+    ]
 
 
 @pytest.fixture
@@ -18,3 +33,64 @@ def test_DataOperations(data_filenames):
 def test_GetRestructuredData(test_DataOperations):
 
     lst.GetRestructuredData(test_DataOperations)
+
+
+def test_open_sweeps_order(synthetic_files):
+
+    datasets, errors = open_sweeps(synthetic_files, workers=2)
+
+    assert errors == {}
+    for file_name, ds in zip(synthetic_files, datasets):
+        assert ds.identical(open_sweep(file_name))
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_open_sweeps_errors(synthetic_files, executor):
+
+    file_names = synthetic_files[:2] + ["missing_file.nc"]
+    datasets, errors = open_sweeps(file_names, workers=2, executor=executor)
+
+    assert datasets[2] is None
+    assert list(errors) == ["missing_file.nc"]
+    assert np.all([ds.azimuth.values for ds in datasets[:2]] == [[0], [1]])
+
+
+def test_open_sweeps_sequential(synthetic_files):
+
+    datasets, errors = open_sweeps(synthetic_files, workers=1)
+
+    assert errors == {}
+    assert len(datasets) == len(synthetic_files)
+
+
+def test_open_sweeps_invalid_executor(synthetic_files):
+
+    with pytest.raises(ValueError):
+        open_sweeps(synthetic_files, executor="cluster")
+
+
+def test_open_sweep_sweep_only(synthetic_files):
+
+    ds = open_sweep(synthetic_files[0], sweep_only=True)
+
+    assert ds.identical(open_sweep(synthetic_files[0]))
+
+
+def test_open_sweep_variables(synthetic_files):
+
+    variables = ["azimuth", "elevation", "radial_wind_speed"]
+    ds = open_sweep(synthetic_files[1], sweep_only=True, variables=variables)
+
+    assert set(ds.data_vars) == set(variables)
+    assert np.issubdtype(ds.time.dtype, np.datetime64)
+    assert ds.time.equals(open_sweep(synthetic_files[1]).time)
+
+
+def test_open_sweeps_sweep_only(synthetic_files):
+
+    datasets, errors = open_sweeps(
+        synthetic_files, workers=2, sweep_only=True, variables=["azimuth"]
+    )
+
+    assert errors == {}
+    assert [list(ds.data_vars) for ds in datasets] == [["azimuth"]] * 4
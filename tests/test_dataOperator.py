@@ -1,11 +1,35 @@
+import shutil
+import warnings
+
 import numpy as np
+import pandas as pd
 import pytest
 import xarray as xr
 
 import lidarwind as lst
+from lidarwind import postprocessing, preprocessing
 from lidarwind.data_operator import wc_fixed_preprocessing
 
-from .data import sample_dataset
+from .data import sample_dataset, synthetic_sweep, write_sweep_file
+
+
+@pytest.fixture
+def six_beam_files(tmp_path):
+    """Sequence of synthetic sweeps from a 6 beam scan"""
+
+    file_names = []
+    for i, azimuth in enumerate([0, 72, 144, 0, 216, 288, 360.04]):
+
+        elevation = 90 if i == 3 else 75
+        ds = synthetic_sweep(
+            start=f"2021-05-13 12:00:{i:02d}",
+            azimuth=[azimuth, azimuth],
+            elevation=elevation,
+            step=0.4,
+        )
+        file_names.append(write_sweep_file(tmp_path / f"sweep_{i}.nc", ds))
+
+    return file_names
 
 
 #
@@ -15,6 +39,143 @@ def test_data_operator_DataOperations_data_paths():
         lst.DataOperations(data_paths=None)
 
 
+def test_data_operator_DataOperations_lazy(six_beam_files):
+
+    merged_data = lst.DataOperations(six_beam_files).merged_data
+    lazy_data = lst.DataOperations(six_beam_files, lazy=True).merged_data
+
+    assert lazy_data["radial_wind_speed"].chunks is not None
+    xr.testing.assert_identical(merged_data, lazy_data.compute())
+
+    xr.testing.assert_identical(
+        lst.GetRestructuredData(merged_data).data_transf,
+        lst.GetRestructuredData(lazy_data).data_transf,
+    )
+
+
+def test_data_operator_DataOperations_lazy_skips_bad_file(
+    six_beam_files, tmp_path, caplog
+):
+
+    corrupt_file = tmp_path / "corrupt.nc"
+    corrupt_file.write_bytes(b"not a netcdf file")
+
+    merged_data = lst.DataOperations(six_beam_files).merged_data
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        lazy_data = lst.DataOperations(
+            six_beam_files + [str(corrupt_file)], lazy=True
+        ).merged_data
+
+    xr.testing.assert_identical(merged_data, lazy_data.compute())
+    assert str(corrupt_file) in caplog.text
+
+
+@pytest.fixture
+def dbs_files(tmp_path):
+    """Synthetic DBS files with four complete scans each"""
+
+    file_names = []
+    for i in range(3):
+
+        ds = synthetic_sweep(
+            start=f"2021-05-13 12:{i:02d}:00",
+            azimuth=np.tile([0, 90, 180, 270, 0], 4),
+            elevation=np.tile([75, 75, 75, 75, 90], 4),
+        )
+        file_names.append(write_sweep_file(tmp_path / f"dbs_{i}.nc", ds))
+
+    return file_names
+
+
+def test_data_operator_DbsOperations_merge_data(dbs_files):
+
+    var_list = ["azimuth", "elevation", "radial_wind_speed"]
+    ds = lst.DbsOperations(file_list=dbs_files, var_list=var_list).merged_ds
+
+    assert ds.time.size == 60
+    assert ds.indexes["time"].is_monotonic_increasing
+    assert set(ds.data_vars) == set(var_list + ["scan_mean_time"])
+
+    scan_mean_time = ds.scan_mean_time.values.reshape(-1, 5)
+    scan_time = ds.time.values.reshape(-1, 5)
+    assert (scan_mean_time == scan_time[:, 2:3]).all()
+
+
+def test_data_operator_DbsOperations_mean_time_derivation(dbs_files):
+
+    dbs = lst.DbsOperations(file_list=dbs_files[:1], var_list=["azimuth"])
+
+    # starting in the middle of a scan: the scans are defined by the
+    # azimuth of the first ray and the last (partial) scan is kept
+    ds = xr.decode_cf(
+        synthetic_sweep(
+            azimuth=np.tile([0, 90, 180, 270, 0], 3)[2:],
+            elevation=np.tile([75, 75, 75, 75, 90], 3)[2:],
+        )
+    )
+    ds = dbs.mean_time_derivation(ds)
+
+    assert ds.time.size == 13
+    assert (ds.azimuth.values[[0, 5, 10]] == 180).all()
+    assert (
+        ds.scan_mean_time.values[:10]
+        == ds.time.values[:10].reshape(-1, 5)[:, [2]].repeat(5, axis=1).ravel()
+    ).all()
+    assert (ds.scan_mean_time.values[10:] == ds.time.values[11]).all()
+
+
+def test_data_operator_DbsOperations_missing_variable(dbs_files):
+
+    ds = lst.DbsOperations(
+        file_list=dbs_files, var_list=["azimuth", "str"]
+    ).merged_ds
+
+    assert len(ds.variables) == 0
+
+
+def test_data_operator_DbsOperations_deprecated(dbs_files):
+
+    var_list = ["radial_wind_speed"]
+    dbs = lst.DbsOperations(file_list=dbs_files[:1], var_list=var_list)
+    ds = dbs.mean_time_derivation(lst.open_sweep(dbs_files[1]))
+    ds = ds.drop_vars("scan_mean_time")
+
+    with pytest.deprecated_call():
+        ds = dbs.add_mean_time(ds)
+
+    mean_time = ds.time.values[0] + (ds.time - ds.time[0]).mean().values
+    assert (
+        np.abs(ds.scan_mean_time.values - mean_time) < np.timedelta64(1, "ms")
+    ).all()
+
+    with pytest.deprecated_call():
+        dbs.merge_2_ds(ds, var_list)
+
+    assert dbs.merged_ds.time.size == 40
+
+
+def test_data_operator_DbsOperations_partial_file(dbs_files, tmp_path):
+
+    ds = synthetic_sweep(
+        start="2021-05-13 12:10:00",
+        azimuth=np.tile([0, 90, 180, 270, 0], 4),
+        elevation=np.tile([75, 75, 75, 75, 90], 4),
+    ).drop_vars("cnr")
+    partial_file = write_sweep_file(tmp_path / "dbs_partial.nc", ds)
+
+    var_list = ["radial_wind_speed", "cnr"]
+    merged_ds = lst.DbsOperations(
+        file_list=dbs_files + [partial_file], var_list=var_list
+    ).merged_ds
+
+    # the file missing cnr is skipped, including its radial_wind_speed
+    assert merged_ds.time.size == 60
+    assert (merged_ds.time < np.datetime64("2021-05-13T12:10")).all()
+    assert merged_ds["radial_wind_speed"].notnull().all()
+
+
 #
 def test_data_operator_ReadProcessedData_file_list():
 
@@ -45,6 +206,128 @@ def test_data_operator_getResampled_xr_data_array_none():
         lst.GetResampledData(xr_data_array=np.array([0, 1]))
 
 
+def get_irregular_data_array():
+
+    rng = np.random.default_rng(42)
+    seconds = np.sort(rng.uniform(0, 86400, 500))
+    time = pd.to_datetime("2021-05-13") + pd.to_timedelta(seconds, "s")
+
+    return xr.DataArray(
+        rng.normal(size=(500, 3)),
+        dims=("time", "range"),
+        coords={"time": time, "range": [100, 150, 200]},
+        name="radial_wind_speed",
+    )
+
+
+def dense_nearest_index(ref_grid, orig_grid, tolerance):
+    """Nearest index from the full matrix of distances"""
+
+    delta_grid = np.abs(orig_grid[np.newaxis, :] - ref_grid[:, np.newaxis])
+
+    grid_index = np.argmin(delta_grid, axis=1).astype(float)
+    grid_index[np.min(delta_grid, axis=1) > tolerance] = np.nan
+
+    return grid_index
+
+
+def test_data_operator_getResampled_same_as_delta_grid():
+
+    data = get_irregular_data_array()
+    resampled = lst.GetResampledData(data, time_freq="5min", tolerance=60)
+
+    time_ref_sec = np.array(resampled.time_ref, "datetime64[ns]").astype(
+        float
+    ) * 10 ** (-9)
+    time_orig_sec = np.array(data.time.values, float) * 10 ** (-9)
+    expected = dense_nearest_index(time_ref_sec, time_orig_sec, 60)
+
+    index = resampled.get_nearest_index(time_ref_sec, time_orig_sec, 60)
+    np.testing.assert_array_equal(index, expected)
+    assert np.isfinite(index).sum() > 100
+
+    expected_values = np.full((len(expected), 3), np.nan)
+    valid = np.isfinite(expected)
+    expected_values[valid] = data.values[expected[valid].astype(int)]
+    np.testing.assert_array_equal(resampled.values, expected_values)
+
+
+def test_data_operator_getResampled_equidistant():
+
+    time = pd.date_range("2021-05-13", periods=100, freq="10s")
+    data = xr.DataArray(
+        np.arange(300.0).reshape(100, 3),
+        dims=("time", "range"),
+        coords={"time": time, "range": [100, 150, 200]},
+    )
+
+    resampled = lst.GetResampledData(data, time_freq="15s", tolerance=5)
+
+    # every other reference time is between two samples,
+    # the earlier one is selected as with np.argmin
+    np.testing.assert_array_equal(
+        resampled.time_index_array[:6], [0, 1, 3, 4, 6, 7]
+    )
+    np.testing.assert_array_equal(
+        resampled.resampled.values[:4, 0], [0, 3, 9, 12]
+    )
+
+
+def test_data_operator_getResampled_unsorted_time():
+
+    data = get_irregular_data_array()
+    resampled = lst.GetResampledData(data, time_freq="5min", tolerance=60)
+
+    shuffled = data.isel(time=np.random.default_rng(0).permutation(500))
+    resampled_shuffled = lst.GetResampledData(
+        shuffled, time_freq="5min", tolerance=60
+    )
+
+    xr.testing.assert_identical(
+        resampled.resampled, resampled_shuffled.resampled
+    )
+    assert np.isfinite(resampled.values).sum() > 100
+
+
+def test_data_operator_getResampled_dataset():
+
+    data = get_irregular_data_array()
+    ds = xr.Dataset(
+        {
+            "radial_wind_speed": data,
+            "cnr": data * 2,
+            "azimuth": data.isel(range=0, drop=True),
+        }
+    )
+    ds["cnr"].attrs = {"units": "dB"}
+    ds["fixed_parameter"] = xr.DataArray(1)
+
+    resampled = lst.GetResampledData(ds, time_freq="5min", tolerance=60)
+
+    assert isinstance(resampled.resampled, xr.Dataset)
+    assert set(resampled.resampled.data_vars) == {
+        "radial_wind_speed",
+        "cnr",
+        "azimuth",
+    }
+    assert resampled.resampled["cnr"].attrs["units"] == "dB"
+    assert np.isfinite(resampled.resampled["cnr"].values).sum() > 100
+
+    for var in ["radial_wind_speed", "cnr"]:
+        expected = lst.GetResampledData(
+            ds[var], time_freq="5min", tolerance=60
+        ).values
+        np.testing.assert_array_equal(
+            resampled.resampled[var].transpose("time_ref", "range").values,
+            expected,
+        )
+
+    assert (
+        np.isfinite(resampled.resampled["azimuth"].values)
+        == np.isfinite(resampled.time_index_array)
+    ).all()
+
+
 #
 def test_data_operator_DbsOperations_file_list_none():
 
@@ -125,3 +408,141 @@ def test_wc_fixed_preprocessing_without_elevation():
 
     with pytest.raises(AssertionError):
         ds = wc_fixed_preprocessing(ds)
+
+
+@pytest.fixture
+def fixed_files(tmp_path):
+    """Synthetic fixed files, a single ray each"""
+
+    file_names = []
+    for i, azimuth in enumerate([0, 72, 144, 216, 288, 0] * 3):
+
+        elevation = 90 if i % 6 == 5 else 75
+        ds = synthetic_sweep(
+            start=f"2021-05-13 12:00:{3 * i:02d}",
+            azimuth=[azimuth],
+            elevation=elevation,
+            n_gates=6 if elevation == 90 else 4,
+        )
+        file_names.append(write_sweep_file(tmp_path / f"fixed_{i}.nc", ds))
+
+    return file_names
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 500])
+def test_wc_fixed_merge_files_to_store(fixed_files, tmp_path, batch_size):
+
+    merged = preprocessing.wc_fixed_merge_files(fixed_files)
+
+    shuffled = [
+        fixed_files[i] for i in np.random.default_rng(0).permutation(18)
+    ]
+    store_path = tmp_path / "store"
+    streamed = preprocessing.wc_fixed_merge_files_to_store(
+        shuffled, store_path, batch_size=batch_size
+    )
+
+    assert streamed["radial_wind_speed"].chunks is not None
+    assert len(list(store_path.iterdir())) == -(-18 // batch_size)
+    xr.testing.assert_identical(merged, streamed.compute())
+
+    streamed.close()
+
+
+def test_wc_fixed_merge_files_to_store_empty_file_names(tmp_path):
+
+    with pytest.raises(FileNotFoundError):
+        preprocessing.wc_fixed_merge_files_to_store([], tmp_path)
+
+
+@pytest.mark.parametrize("duplicated", [False, True])
+def test_wc_fixed_merge_files_same_as_merge(fixed_files, tmp_path, duplicated):
+
+    file_names = fixed_files[::-1]
+
+    if duplicated:
+        # copies, since reopening the same file is not reliable with HDF5
+        file_names = file_names + [
+            shutil.copy(file, tmp_path / f"copy_{i}.nc")
+            for i, file in enumerate(file_names[:2])
+        ]
+
+    merged = preprocessing.wc_fixed_merge_files(file_names).load()
+
+    restructured = []
+    for file in file_names:
+        with lst.open_sweep(file, sweep_only=True) as ds:
+            restructured.append(
+                preprocessing.wc_fixed_files_restruc_dataset(ds.load())
+            )
+    expected = xr.merge(
+        [
+            xr.merge([ds for ds in restructured if ds.elevation == 90]),
+            xr.merge([ds for ds in restructured if ds.elevation != 90]),
+        ]
+    )
+
+    xr.testing.assert_identical(merged, expected)
+
+
+@pytest.mark.parametrize("step", [3, 4, 7])
+def test_incremental_wind_processor_same_as_batch(fixed_files, step):
+
+    expected = postprocessing.get_horizontal_wind(
+        preprocessing.wc_azimuth_elevation_correction(
+            preprocessing.wc_fixed_merge_files(fixed_files)
+        )
+    )
+
+    processor = postprocessing.IncrementalWindProcessor()
+
+    parts = []
+    for i in range(0, len(fixed_files), step):
+        parts.append(processor.update(fixed_files[: i + step]))
+    parts.append(processor.flush())
+
+    wind = xr.concat([part for part in parts if part is not None], "time")
+
+    assert processor.half_cycle == 9
+    xr.testing.assert_allclose(wind, expected)
+
+
+def test_incremental_wind_processor_no_new_files(fixed_files):
+
+    processor = postprocessing.IncrementalWindProcessor()
+    processor.update(fixed_files[:12])
+
+    assert processor.update(fixed_files[:12]) is None
+
+
+def test_incremental_wind_processor_late_files(fixed_files, caplog):
+
+    expected = postprocessing.get_horizontal_wind(
+        preprocessing.wc_azimuth_elevation_correction(
+            preprocessing.wc_fixed_merge_files(fixed_files)
+        ),
+        half_cycle=9,
+    )
+
+    processor = postprocessing.IncrementalWindProcessor()
+    first = processor.update(
+        fixed_files[:2] + fixed_files[3:7] + fixed_files[8:12]
+    )
+    last_time = processor.last_time
+
+    # the ray at 12:00:06 is too old, the one at 12:00:21 is merged
+    assert processor.update(fixed_files[:12]) is None
+    assert "1 were merged for the next profiles and 1 were dropped" in (
+        caplog.text
+    )
+    assert np.datetime64("2021-05-13T12:00:06") not in processor.buffer.time
+    assert np.datetime64("2021-05-13T12:00:21") in processor.buffer.time
+
+    parts = [processor.update(fixed_files), processor.flush()]
+    wind = xr.concat([part for part in parts if part is not None], "time")
+
+    assert (wind.time > last_time).all()
+    assert xr.concat([first, wind], "time").indexes["time"].is_unique
+    xr.testing.assert_allclose(
+        wind, expected.sel(time=expected.time > last_time)
+    )
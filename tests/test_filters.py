@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+import lidarwind as lst
+
+
+@pytest.fixture
+def get_dummy_filter_data():
+
+    rng = np.random.default_rng(0)
+
+    elv = np.tile([75, 75, 75, 75, 90], 3)
+    azm = np.tile([0, 90, 180, 270, 0], 3)
+    time = np.arange(len(elv))
+
+    def random_var(range_name):
+        return xr.DataArray(
+            rng.normal(size=(len(time), 4)),
+            dims=("time", range_name),
+            coords={"time": time, range_name: np.arange(4)},
+        )
+
+    def status_var(range_name):
+        return xr.DataArray(
+            (rng.uniform(size=(len(time), 4)) > 0.3).astype(int),
+            dims=("time", range_name),
+            coords={"time": time, range_name: np.arange(4)},
+        )
+
+    test_ds = xr.Dataset(
+        {
+            "elevation": ("time", elv),
+            "azimuth": ("time", azm),
+            "radial_wind_speed": random_var("range"),
+            "radial_wind_speed_status": status_var("range"),
+            "cnr": random_var("range"),
+            "radial_wind_speed90": random_var("range90"),
+            "radial_wind_speed_status90": status_var("range90"),
+            "cnr90": random_var("range90"),
+            "relative_beta90": random_var("range90"),
+        }
+    )
+
+    return test_ds
+
+
+@pytest.mark.parametrize("snr", [False, 0])
+@pytest.mark.parametrize("status", [True, False])
+def test_filtering_vertical_obs_comp(get_dummy_filter_data, snr, status):
+
+    ds = get_dummy_filter_data
+    expected = ds.radial_wind_speed90
+
+    if status:
+        expected = expected.where(ds.radial_wind_speed_status90 == 1)
+    if snr is not False:
+        expected = expected.where(ds.cnr90 > snr)
+    expected = expected.where(ds.elevation == 90, drop=True)
+
+    filtered = lst.Filtering(ds).get_vertical_obs_comp(
+        "radial_wind_speed90", snr=snr, status=status
+    )
+
+    xr.testing.assert_identical(filtered, expected)
+
+
+@pytest.mark.parametrize("azm", [0, 90, 270])
+def test_filtering_radial_obs_comp(get_dummy_filter_data, azm):
+
+    ds = get_dummy_filter_data
+    expected = (
+        ds.radial_wind_speed.where(ds.radial_wind_speed_status == 1)
+        .where(ds.cnr > 0)
+        .where((ds.elevation != 90) & (ds.azimuth == azm), drop=True)
+    )
+
+    filtered = lst.Filtering(ds).get_radial_obs_comp(
+        "radial_wind_speed", azm, snr=0
+    )
+
+    xr.testing.assert_identical(filtered, expected)
+
+
+def test_filtering_cache(get_dummy_filter_data):
+
+    filtering = lst.Filtering(get_dummy_filter_data)
+
+    filtering.get_vertical_obs_comp("radial_wind_speed90")
+    mask = filtering.quality_masks[(True, False, True)]
+    index = filtering.beam_indexes[None]
+
+    filtering.get_vertical_obs_comp("relative_beta90")
+
+    assert filtering.quality_masks[(True, False, True)] is mask
+    assert filtering.beam_indexes[None] is index
+    assert len(filtering.quality_masks) == 1
+
+
+@pytest.mark.parametrize("beam", ["vertical", 90])
+def test_filtering_extract(get_dummy_filter_data, beam):
+
+    filtering = lst.Filtering(get_dummy_filter_data)
+
+    if beam == "vertical":
+        variables = ["radial_wind_speed90", "cnr90", "relative_beta90"]
+        expected = [
+            filtering.get_vertical_obs_comp(var, snr=0) for var in variables
+        ]
+    else:
+        variables = ["radial_wind_speed", "cnr"]
+        expected = [
+            filtering.get_radial_obs_comp(var, beam, snr=0)
+            for var in variables
+        ]
+
+    extracted = filtering.extract(variables, beam=beam, snr=0)
+
+    assert isinstance(extracted, xr.Dataset)
+    assert list(extracted.data_vars) == variables
+
+    for var, tmp_data in zip(variables, expected):
+        xr.testing.assert_identical(extracted[var], tmp_data)
+
+
+def test_filtering_extract_wrong_variables(get_dummy_filter_data):
+
+    with pytest.raises(TypeError):
+        lst.Filtering(get_dummy_filter_data).extract("radial_wind_speed90")
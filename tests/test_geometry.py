@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from lidarwind import geometry
+
+
+def test_direction_cosines_unit_vectors():
+
+    cosines = geometry.direction_cosines([0, 90, 180, 270, 0], [75] * 4 + [90])
+
+    np.testing.assert_allclose(np.linalg.norm(cosines, axis=1), 1)
+    np.testing.assert_allclose(cosines[-1], [0, 0, 1], atol=1e-12)
+    assert cosines[1, 0] > 0 and cosines[0, 1] > 0
+
+
+def test_cached_arrays_are_read_only():
+
+    cosines = geometry.direction_cosines([0, 90, 180, 270], [75] * 4)
+
+    with pytest.raises(ValueError):
+        cosines[0, 0] = 0
+
+
+def test_cache_is_keyed_by_values():
+
+    geometry.six_beam_m_matrix.cache_clear()
+
+    azimuth = np.array([0, 72, 144, 216, 288, 0])
+    elevation = np.array([45] * 5 + [90])
+
+    first = geometry.six_beam_m_matrix(azimuth, elevation)
+    second = geometry.six_beam_m_matrix(list(azimuth), elevation.astype(float))
+
+    assert first is second
+    assert geometry.six_beam_m_matrix.cache_info().hits == 1
+
+
+def test_six_beam_m_matrix_values():
+
+    azimuth = np.array([0, 72, 144, 216, 288, 0])
+    elevation = np.array([45] * 5 + [90])
+
+    theta = np.deg2rad(azimuth)
+    phi = np.deg2rad(elevation)
+
+    expected = np.stack(
+        [
+            np.cos(phi) ** 2 * np.sin(theta) ** 2,
+            np.cos(phi) ** 2 * np.cos(theta) ** 2,
+            np.sin(phi) ** 2,
+            2 * np.cos(phi) ** 2 * np.cos(theta) * np.sin(theta),
+            2 * np.cos(phi) * np.sin(phi) * np.sin(theta),
+            2 * np.cos(phi) * np.sin(phi) * np.cos(theta),
+        ],
+        axis=1,
+    )
+
+    np.testing.assert_allclose(
+        geometry.six_beam_m_matrix(azimuth, elevation), expected, atol=1e-12
+    )
+    np.testing.assert_allclose(
+        geometry.six_beam_m_matrix_inv(azimuth, elevation) @ expected,
+        np.eye(6),
+        atol=1e-10,
+    )
+
+
+def test_dbs_pseudo_inverse_rank_deficient():
+
+    assert geometry.dbs_pseudo_inverse([0, 180], [75, 75]) is None
+
+    azimuth = [0, 90, 180, 270, 0]
+    elevation = [75] * 4 + [90]
+    pinv = geometry.dbs_pseudo_inverse(azimuth, elevation)
+
+    wind = np.array([3.0, -2.0, 0.5])
+    radial = geometry.direction_cosines(azimuth, elevation) @ wind
+
+    np.testing.assert_allclose(pinv @ radial, wind)
+
+
+def test_first_harmonic_kernel():
+
+    azimuth = np.arange(0, 360, 72)
+    frequency, cos_kernel, sin_kernel = geometry.first_harmonic_kernel(azimuth)
+
+    assert frequency == 1 / 360
+    np.testing.assert_allclose(cos_kernel, np.cos(np.deg2rad(azimuth)))
+    np.testing.assert_allclose(sin_kernel, np.sin(np.deg2rad(azimuth)))
@@ -124,6 +124,45 @@ def test_get_resctructured_data_data_transf_90_range90_dim_size(
     assert len(get_restruc_obj.data_transf_90.range90) == 1
 
 
+def test_get_resctructured_data_data_transf_nearest_values():
+
+    rng = np.random.default_rng(7)
+    azm = np.tile([0, 72, 144, 216, 288, 0], 5)
+    elv = np.tile([45, 45, 45, 45, 45, 90], 5)
+    time = np.cumsum(rng.uniform(1, 3, len(azm)))
+
+    test_ds = xr.Dataset(
+        {
+            "elevation": ("time", elv),
+            "azimuth": ("time", azm),
+            "radial_wind_speed": (("time", "range"), rng.normal(size=(30, 3))),
+            "radial_wind_speed_status": (
+                ("time", "range"),
+                rng.integers(0, 2, size=(30, 3)),
+            ),
+            "radial_wind_speed90": (("time", "range90"), np.ones((30, 3))),
+            "radial_wind_speed_status90": (
+                ("time", "range90"),
+                np.ones((30, 3)),
+            ),
+            "relative_beta90": (("time", "range90"), np.ones((30, 3))),
+        },
+        coords={"time": time, "range": [1, 2, 3], "range90": [1, 2, 3]},
+    )
+
+    data_transf = lst.GetRestructuredData(test_ds).data_transf
+
+    for azm_value in [0, 72, 144, 216, 288]:
+        expected = (
+            lst.Filtering(test_ds)
+            .get_radial_obs_comp("radial_wind_speed", azm_value)
+            .sel(time=data_transf.time, method="nearest")
+        )
+        np.testing.assert_array_equal(
+            data_transf.sel(azm=azm_value, elv=45).values, expected.values
+        )
+
+
 def test_get_resctructured_data_input_ds_missing_cnr(get_dummy_six_beam_data):
 
     broken_ds = get_dummy_six_beam_data.copy()
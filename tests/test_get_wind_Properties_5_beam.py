@@ -1,8 +1,10 @@
 import numpy as np
+import pandas as pd
 import pytest
 import xarray as xr
 
 import lidarwind as lst
+from lidarwind import geometry, wind_prop_retrieval
 
 
 def get_dummy_dbs():
@@ -91,3 +93,226 @@ def test_get_wind_properties_5_beam_wind_dir_value(get_wind_profiles):
 
 def test_get_wind_properties_5_beam_vert_wind_value(get_wind_profiles):
     assert np.round(get_wind_profiles.ver_wind_speed.values, 1) == 0
+
+
+def get_dbs_scans(u=3, v=-4, n_scans=3):
+
+    azimuth = np.tile([0, 90, 180, 270, 0], n_scans)
+    elevation = np.tile([75, 75, 75, 75, 90], n_scans)
+    time = pd.date_range("2021-05-13", periods=azimuth.size, freq="4s")
+
+    radial_wind_speed = (
+        u * np.sin(np.deg2rad(azimuth)) + v * np.cos(np.deg2rad(azimuth))
+    ) * np.cos(np.deg2rad(elevation))
+
+    ds = xr.Dataset(
+        {
+            "elevation": ("time", elevation),
+            "azimuth": ("time", azimuth),
+            "measurement_height": (
+                ("time", "gate_index"),
+                np.full((azimuth.size, 2), [100, 200]),
+            ),
+            "radial_wind_speed": (
+                ("time", "gate_index"),
+                np.repeat(radial_wind_speed[:, np.newaxis], 2, axis=1),
+            ),
+            "radial_wind_speed_status": (
+                ("time", "gate_index"),
+                np.ones((azimuth.size, 2)),
+            ),
+            "scan_mean_time": ("time", time.values[2::5].repeat(5)),
+        },
+        coords={"time": time},
+    )
+
+    return ds
+
+
+def test_get_wind_properties_5_beam_single_dbs_missing_beam():
+
+    # the south ray of the second scan is missing
+    ds = get_dbs_scans().drop_isel(time=7)
+    wind = lst.GetWindProperties5Beam(ds)
+
+    scan_time = ds.scan_mean_time.values[[0, 5, 9]]
+    np.testing.assert_array_equal(wind.comp_u.time, scan_time)
+    np.testing.assert_array_equal(wind.comp_v.time, scan_time[[0, 2]])
+    np.testing.assert_array_equal(wind.hor_wind_speed.time, scan_time[[0, 2]])
+
+    np.testing.assert_allclose(wind.comp_u, 3)
+    np.testing.assert_allclose(wind.comp_v, -4)
+    np.testing.assert_allclose(wind.hor_wind_speed, 5)
+    np.testing.assert_array_equal(wind.comp_u.range, [100, 200])
+
+
+def test_get_wind_properties_5_beam_continuous():
+
+    ds = get_dbs_scans().drop_isel(time=7)
+    wind = lst.GetWindProperties5Beam(ds, method="continuous", tolerance="8s")
+
+    north_time = ds.time.values[ds.azimuth.values == 0][::2]
+    np.testing.assert_array_equal(wind.comp_v.time, north_time)
+    np.testing.assert_array_equal(wind.comp_u.time, north_time)
+
+    # the second north ray has no south ray within 8 seconds
+    assert np.isnan(wind.comp_v[1]).all()
+    np.testing.assert_allclose(wind.comp_v[[0, 2]], -4)
+    np.testing.assert_allclose(wind.comp_u, 3)
+
+    wind = lst.GetWindProperties5Beam(ds, method="continuous", tolerance="3s")
+    assert np.isnan(wind.hor_wind_speed).all()
+
+
+def get_n_beam_scans(azimuth, elevation, u=3, v=-4, w=0.5, n_scans=3):
+
+    azimuth = np.tile(azimuth, n_scans)
+    elevation = np.tile(elevation, n_scans)
+    n_rays = azimuth.size // n_scans
+
+    radial_wind_speed = (
+        u * np.sin(np.deg2rad(azimuth)) * np.cos(np.deg2rad(elevation))
+        + v * np.cos(np.deg2rad(azimuth)) * np.cos(np.deg2rad(elevation))
+        + w * np.sin(np.deg2rad(elevation))
+    )
+    time = pd.date_range("2021-05-13", periods=azimuth.size, freq="2s")
+
+    return xr.Dataset(
+        {
+            "elevation": ("time", elevation),
+            "azimuth": ("time", azimuth),
+            "measurement_height": (
+                ("time", "gate_index"),
+                np.full((azimuth.size, 2), [100, 200]),
+            ),
+            "radial_wind_speed": (
+                ("time", "gate_index"),
+                np.repeat(radial_wind_speed[:, np.newaxis], 2, axis=1),
+            ),
+            "radial_wind_speed_status": (
+                ("time", "gate_index"),
+                np.ones((azimuth.size, 2)),
+            ),
+            "scan_mean_time": ("time", time.values[::n_rays].repeat(n_rays)),
+        },
+        coords={"time": time},
+    )
+
+
+@pytest.mark.parametrize(
+    "azimuth, elevation",
+    [
+        ([0, 120, 240], [70, 70, 70]),
+        (np.arange(0, 360, 45), np.full(8, 75)),
+        ([0, 90, 180, 270, 0], [75, 75, 75, 75, 90]),
+    ],
+)
+def test_get_wind_properties_n_beam_values(azimuth, elevation):
+
+    geometry.dbs_pseudo_inverse.cache_clear()
+    wind = lst.GetWindPropertiesNBeam(get_n_beam_scans(azimuth, elevation))
+
+    assert wind.comp_u.shape == (3, 2)
+    np.testing.assert_allclose(wind.comp_u, 3)
+    np.testing.assert_allclose(wind.comp_v, -4)
+    np.testing.assert_allclose(wind.comp_w, 0.5)
+    np.testing.assert_allclose(wind.hor_wind_speed, 5)
+    np.testing.assert_array_equal(wind.comp_u.range, [100, 200])
+    assert geometry.dbs_pseudo_inverse.cache_info().currsize == 1
+
+
+def test_get_wind_properties_n_beam_same_as_5_beam():
+
+    # the south ray of the second scan is missing
+    ds = get_dbs_scans().drop_isel(time=7)
+
+    geometry.dbs_pseudo_inverse.cache_clear()
+    wind_n_beam = lst.GetWindPropertiesNBeam(ds)
+    wind_5_beam = lst.GetWindProperties5Beam(ds.copy())
+
+    assert geometry.dbs_pseudo_inverse.cache_info().currsize == 2
+    xr.testing.assert_allclose(
+        wind_n_beam.hor_wind_speed.sel(time=wind_5_beam.hor_wind_speed.time),
+        wind_5_beam.hor_wind_speed,
+    )
+    xr.testing.assert_allclose(
+        wind_n_beam.hor_wind_dir.sel(time=wind_5_beam.hor_wind_dir.time),
+        wind_5_beam.hor_wind_dir,
+    )
+    np.testing.assert_allclose(wind_n_beam.comp_v, -4)
+
+
+def test_get_wind_properties_n_beam_missing_data():
+
+    ds = get_n_beam_scans([0, 90, 180, 270, 0], [75, 75, 75, 75, 90])
+
+    # only opposite beams are left in the first scan
+    ds = ds.drop_isel(time=[1, 3])
+    ds["radial_wind_speed"][5, 1] = np.nan
+
+    wind = lst.GetWindPropertiesNBeam(ds)
+
+    assert np.isnan(wind.comp_u[0]).all()
+    np.testing.assert_allclose(wind.comp_u[1:], 3)
+    np.testing.assert_allclose(wind.comp_v[1:], -4)
+    np.testing.assert_allclose(wind.comp_w[1:], 0.5)
+
+
+def test_get_wind_properties_n_beam_masked_gate():
+
+    ds = get_n_beam_scans([0, 90, 180, 270, 0], [75, 75, 75, 75, 90])
+
+    # the east beam of the second scan is filtered at the first gate
+    ds["radial_wind_speed_status"][6, 0] = 0
+    # only two beams are left at the second gate of the last scan
+    ds["radial_wind_speed"][[10, 11, 14], 1] = np.nan
+
+    wind = lst.GetWindPropertiesNBeam(ds)
+
+    assert np.isnan(wind.comp_u[2, 1])
+    np.testing.assert_allclose(wind.comp_u.values.ravel()[:5], 3)
+    np.testing.assert_allclose(wind.comp_v.values.ravel()[:5], -4)
+    np.testing.assert_allclose(wind.comp_w.values.ravel()[:5], 0.5)
+
+
+def test_get_wind_properties_n_beam_range():
+
+    ds = get_dbs_scans()
+
+    # the slanted gates are lower than the vertical ones
+    slanted = ds.elevation != 90
+    ds["measurement_height"] = ds.measurement_height.where(
+        ~slanted, ds.measurement_height * np.sin(np.deg2rad(75))
+    )
+
+    wind_n_beam = lst.GetWindPropertiesNBeam(ds)
+    wind_5_beam = lst.GetWindProperties5Beam(ds.copy())
+
+    np.testing.assert_array_equal(wind_n_beam.comp_u.range, [100, 200])
+    np.testing.assert_array_equal(
+        wind_n_beam.comp_u.range, wind_5_beam.comp_u.range
+    )
+
+
+def test_get_wind_properties_n_beam_input():
+
+    with pytest.raises(TypeError):
+        lst.GetWindPropertiesNBeam(xr.DataArray([0, 1]))
+
+
+def test_hor_wind_speed_and_dir():
+
+    comp_u = xr.DataArray([3.0, 0.0], dims="range")
+    comp_v = xr.DataArray([-4.0, 2.0], dims="range")
+
+    wind_speed = wind_prop_retrieval.hor_wind_speed(comp_u, comp_v)
+    wind_dir = wind_prop_retrieval.hor_wind_dir(comp_u, comp_v)
+
+    np.testing.assert_allclose(wind_speed, [5, 2])
+    np.testing.assert_allclose(
+        wind_dir, [180 + np.rad2deg(np.arctan2(3, -4)), 180]
+    )
+    assert wind_speed.name == "hor_wind_speed"
+    assert wind_speed.attrs["units"] == "m/s"
+    assert wind_dir.name == "hor_wind_dir"
+    assert wind_dir.attrs["units"] == "deg"
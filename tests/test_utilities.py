@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from lidarwind.utilities import nearest_index, rolling_variance
+
+
+def test_nearest_index_values():
+
+    grid = np.array([0.0, 1.0, 2.0, 4.0])
+    index = nearest_index(grid, np.array([-5, 0.2, 0.5, 2.9, 3.1, 9, np.nan]))
+
+    np.testing.assert_array_equal(index, [0, 0, 1, 2, 3, 3, -1])
+
+
+def test_nearest_index_tie():
+
+    grid = np.array([0.0, 10.0, 20.0, 30.0])
+    values = np.array([5.0, 15.0, 20.0, 25.0])
+
+    np.testing.assert_array_equal(nearest_index(grid, values), [1, 2, 2, 3])
+    np.testing.assert_array_equal(
+        nearest_index(grid, values, tie="earlier"), [0, 1, 2, 2]
+    )
+
+    with pytest.raises(ValueError):
+        nearest_index(grid, values, tie="middle")
+
+
+def test_nearest_index_tolerance():
+
+    grid = pd.date_range("2021-05-13", periods=4, freq="10s").values
+    values = grid + np.timedelta64(4, "s")
+
+    index = nearest_index(grid, values, tolerance=np.timedelta64(3, "s"))
+    assert (index == -1).all()
+
+    index = nearest_index(grid, values, tolerance=np.timedelta64(4, "s"))
+    np.testing.assert_array_equal(index, [0, 1, 2, 3])
+
+
+def test_nearest_index_empty_grid():
+
+    assert (nearest_index(np.array([]), np.arange(3)) == -1).all()
+
+
+@pytest.mark.parametrize("window", [1, 4, 7])
+@pytest.mark.parametrize("center", [True, False])
+@pytest.mark.parametrize("min_periods", [None, 2])
+def test_rolling_variance_same_as_xarray(window, center, min_periods):
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(5, 2, size=(50, 3))
+    values[rng.random(values.shape) < 0.2] = np.nan
+
+    expected = (
+        xr.DataArray(values, dims=("range", "time"))
+        .rolling(time=window, center=center, min_periods=min_periods)
+        .var()
+    )
+
+    variance = rolling_variance(
+        values, window, min_periods=min_periods, center=center, axis=1
+    )
+
+    np.testing.assert_allclose(variance, expected.values)
+
+
+def test_rolling_variance_chunks():
+
+    values = np.random.default_rng(0).normal(size=(100, 2))
+    variance = rolling_variance(values, 10, min_periods=3, center=True)
+
+    for chunk_size in [1, 7, 1000]:
+        np.testing.assert_allclose(
+            rolling_variance(
+                values, 10, min_periods=3, center=True, chunk_size=chunk_size
+            ),
+            variance,
+        )
+
+
+def test_rolling_variance_constant():
+
+    variance = rolling_variance(np.full((20, 2), 0.1), 5, min_periods=1)
+
+    assert np.all(variance == 0)
+
+
+def test_rolling_variance_min_periods():
+
+    with pytest.raises(ValueError):
+        rolling_variance(np.ones(5), 3, min_periods=0)
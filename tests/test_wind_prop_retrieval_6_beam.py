@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import pytest
 import xarray as xr
 
@@ -75,6 +76,18 @@ def test_six_beam_method_m_matrix_inv(test_get_six_beam_obj):
     assert np.all(np.isfinite(test_get_six_beam_obj.m_matrix_inv))
 
 
+def test_six_beam_method_m_matrix_copy(test_get_six_beam_obj):
+
+    m_matrix = test_get_six_beam_obj.m_matrix.copy()
+    test_get_six_beam_obj.m_matrix[:] = 0
+    test_get_six_beam_obj.m_matrix_inv[:] = 0
+
+    np.testing.assert_array_equal(
+        lst.SixBeamMethod(get_dummy_six_beam_obj(), freq=6, freq90=6).m_matrix,
+        m_matrix,
+    )
+
+
 def test_six_beam_method_variance_dic(test_get_six_beam_obj):
 
     assert len(test_get_six_beam_obj.radial_variances.keys()) == 2
@@ -107,3 +120,91 @@ def test_six_beam_method_variance_dim_time(test_get_six_beam_obj):
 def test_six_beam_method_variance_dim_range(test_get_six_beam_obj):
 
     assert len(test_get_six_beam_obj.var_comp_ds.range.values) == 1
+
+
+def test_six_beam_method_sigma_same_as_inverse(test_get_six_beam_obj):
+
+    six_beam_obj = test_get_six_beam_obj
+    six_beam_obj.s_matrix = np.random.default_rng(0).normal(size=(6, 3, 2))
+    six_beam_obj.get_sigma()
+
+    assert six_beam_obj.sigma_matrix.shape == (6, 3, 2)
+    np.testing.assert_allclose(
+        six_beam_obj.sigma_matrix,
+        np.einsum(
+            "ij,j...->i...", six_beam_obj.m_matrix_inv, six_beam_obj.s_matrix
+        ),
+    )
+
+
+def get_merged_data(n_cycles=40, n_range=5):
+
+    rng = np.random.default_rng(0)
+    n_time = 6 * n_cycles
+
+    data = xr.DataArray(
+        rng.normal(size=(n_time, n_range)),
+        dims=("time", "range"),
+        coords={
+            "time": pd.date_range("2021-05-13", periods=n_time, freq="4s"),
+            "range": np.arange(n_range),
+        },
+    )
+    data = data.where(rng.random(data.shape) > 0.1)
+    data90 = data.rename(range="range90") * 0.5
+
+    return xr.Dataset(
+        {
+            "elevation": ("time", np.tile([75, 75, 90, 75, 75, 75], n_cycles)),
+            "azimuth": ("time", np.tile([0, 72, 0, 144, 216, 288], n_cycles)),
+            "radial_wind_speed90": data90,
+            "radial_wind_speed_status90": data90 * 0 + 1,
+            "relative_beta90": data90 * 0 + 1,
+            "radial_wind_speed": data,
+            "radial_wind_speed_status": data * 0 + 1,
+        }
+    )
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 1000])
+def test_six_beam_method_to_store(tmp_path, block_size):
+
+    data = get_merged_data()
+    expected = lst.SixBeamMethod(
+        lst.GetRestructuredData(data), freq=6, freq90=6
+    ).var_comp_ds
+
+    var_comp_ds = lst.six_beam_method_to_store(
+        data.chunk({"time": 50}),
+        tmp_path / "store",
+        block_size=block_size,
+        freq=6,
+        freq90=6,
+    )
+
+    assert len(list((tmp_path / "store").iterdir())) == -(-40 // block_size)
+    xr.testing.assert_allclose(var_comp_ds.compute(), expected)
+
+    var_comp_ds.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_six_beam_method_chunk_size(chunk_size):
+
+    data = lst.GetRestructuredData(get_merged_data())
+
+    expected = lst.SixBeamMethod(data, freq=6, freq90=6)
+    chunked = lst.SixBeamMethod(data, freq=6, freq90=6, chunk_size=chunk_size)
+
+    assert np.isfinite(expected.var_comp_ds["var_u"]).any()
+    xr.testing.assert_allclose(chunked.var_comp_ds, expected.var_comp_ds)
+
+
+def test_six_beam_method_to_store_without_vertical(tmp_path):
+
+    data = get_merged_data()
+
+    with pytest.raises(ValueError):
+        lst.six_beam_method_to_store(
+            data.where(data.elevation != 90, drop=True), tmp_path
+        )
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from lidarwind.wind_retrieval import (
+    fft_wind_retrieval,
+    sine_fit_wind_retrieval,
+)
+
+
+def get_radial_velocity(azimuths, u=3, v=-4, offset=0.5, elevation=75):
+
+    radial_velocity = (
+        u * np.sin(np.deg2rad(azimuths)) + v * np.cos(np.deg2rad(azimuths))
+    ) * np.cos(np.deg2rad(elevation)) + offset
+
+    return xr.DataArray(
+        np.tile(radial_velocity, (3, 1)),
+        dims=("range", "azimuth"),
+        coords={
+            "range": [100, 200, 300],
+            "azimuth": azimuths,
+            "elevation": elevation,
+        },
+    )
+
+
+def test_first_harmonic_amplitude_type():
+
+    with pytest.raises(TypeError):
+        sine_fit_wind_retrieval.first_harmonic_amplitude(np.ones(4))
+
+
+def test_sine_fit_same_as_fft_regular_grid():
+
+    radial_velocity = xr.DataArray(
+        np.random.default_rng(0).normal(size=(72, 10)),
+        dims=("azimuth", "range"),
+        coords={"azimuth": np.arange(0, 360, 5), "elevation": 75},
+    )
+
+    xr.testing.assert_allclose(
+        sine_fit_wind_retrieval.get_wind_properties(radial_velocity),
+        fft_wind_retrieval.get_wind_properties(radial_velocity).drop_vars(
+            "freq_azimuth"
+        ),
+        check_dim_order=False,
+    )
+
+
+def test_sine_fit_irregular_gappy_azimuth():
+
+    azimuths = np.sort(np.random.default_rng(0).uniform(0, 360, 50))
+    radial_velocity = get_radial_velocity(azimuths)
+    radial_velocity[0, ::2] = np.nan
+    radial_velocity[1, azimuths > 180] = np.nan
+
+    wind_ds = sine_fit_wind_retrieval.get_wind_properties(radial_velocity)
+
+    np.testing.assert_allclose(wind_ds["zonal_wind"], -3)
+    np.testing.assert_allclose(wind_ds["meridional_wind"], -4)
+    np.testing.assert_allclose(wind_ds["horizontal_wind_speed"], 5)
+
+
+def test_sine_fit_not_enough_samples():
+
+    radial_velocity = get_radial_velocity(np.arange(0, 360, 30.0))
+    radial_velocity[0, 2:] = np.nan
+    radial_velocity[1, 1:] = np.inf
+
+    wind_ds = sine_fit_wind_retrieval.get_wind_properties(radial_velocity)
+
+    assert np.isnan(wind_ds["horizontal_wind_speed"][0])
+    assert np.isnan(wind_ds["horizontal_wind_speed"][1])
+    assert np.isclose(wind_ds["horizontal_wind_speed"][2], 5)
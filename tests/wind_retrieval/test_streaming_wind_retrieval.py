@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from lidarwind.wind_retrieval import fft_wind_retrieval
+from lidarwind.wind_retrieval.streaming_wind_retrieval import (
+    StreamingWindRetrieval,
+)
+
+AZIMUTH = [0, 72, 144, 216, 288]
+
+
+def get_rays(n_cycles=3, n_gates=4):
+
+    rng = np.random.default_rng(0)
+    n_rays = n_cycles * len(AZIMUTH)
+
+    return xr.Dataset(
+        {
+            "radial_wind_speed": (
+                ("time", "gate_index"),
+                rng.normal(size=(n_rays, n_gates)),
+            )
+        },
+        coords={
+            "time": pd.date_range(
+                "2021-05-13 12:00", periods=n_rays, freq="4s"
+            ),
+            "azimuth": ("time", np.tile(AZIMUTH, n_cycles)),
+            "elevation": ("time", np.full(n_rays, 75)),
+        },
+    )
+
+
+def test_streaming_wind_retrieval_same_as_fft():
+
+    rays = get_rays()
+    retrieval = StreamingWindRetrieval(AZIMUTH, elevation=75, n_gates=4)
+
+    profiles = []
+    for i in range(rays.sizes["time"]):
+        ray = rays.isel(time=i)
+        profile = retrieval.ingest(
+            ray.time.values, ray.azimuth.values, ray.radial_wind_speed
+        )
+
+        assert (profile is None) == (i % 5 != 4)
+
+        if profile is not None:
+            profiles.append(profile)
+
+    for cycle, profile in enumerate(profiles):
+        rays_cycle = rays.isel(time=slice(5 * cycle, 5 * cycle + 5))
+        radial_velocity = (
+            rays_cycle["radial_wind_speed"]
+            .swap_dims(time="azimuth")
+            .drop_vars("time")
+            .assign_coords(elevation=75)
+            .transpose("gate_index", "azimuth")
+        )
+        expected = fft_wind_retrieval.get_wind_properties(radial_velocity)
+
+        assert profile.time == rays_cycle.time[-1]
+        xr.testing.assert_allclose(profile.drop_vars("time"), expected)
+
+
+def test_streaming_wind_retrieval_ingest_dataset():
+
+    rays = get_rays()
+    vertical = rays.isel(time=[2]).assign_coords(
+        elevation=("time", [90]),
+        time=rays.time[[2]] + np.timedelta64(1, "s"),
+    )
+    rays_with_vertical = xr.concat([rays, vertical], dim="time")
+
+    streamed = StreamingWindRetrieval(AZIMUTH, 75, 4).ingest_dataset(
+        rays_with_vertical
+    )
+
+    retrieval = StreamingWindRetrieval(AZIMUTH, 75, 4)
+    expected = [
+        retrieval.ingest(time, azimuth, velocity)
+        for time, azimuth, velocity in zip(
+            rays.time.values,
+            rays.azimuth.values,
+            rays.radial_wind_speed.values,
+        )
+    ]
+
+    xr.testing.assert_identical(
+        streamed,
+        xr.concat([ds for ds in expected if ds is not None], dim="time"),
+    )
+
+
+def test_streaming_wind_retrieval_incomplete_cycle():
+
+    retrieval = StreamingWindRetrieval(AZIMUTH, 75, 4)
+
+    # repeating an azimuth does not complete the cycle
+    for azimuth in [0, 72, 144, 144, 216, 359.8]:
+        assert retrieval.ingest(0, azimuth, np.ones(4)) is None
+
+    assert retrieval.ingest(0, 45, np.ones(4)) is None
+    assert retrieval.ingest(0, 288, np.ones(4)) is not None
+
+
+def test_streaming_wind_retrieval_wrong_input():
+
+    with pytest.raises(ValueError):
+        StreamingWindRetrieval([0, 90, 270], 75, 4)
+
+    retrieval = StreamingWindRetrieval(AZIMUTH, 75, 4)
+
+    with pytest.raises(ValueError):
+        retrieval.ingest(0, 0, np.ones(3))
+
+    with pytest.raises(TypeError):
+        retrieval.ingest_dataset(np.ones(3))
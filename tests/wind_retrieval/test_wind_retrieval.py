@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
+import pytest
 import xarray as xr
+import xrft
 
 from lidarwind import preprocessing
 from lidarwind.wind_retrieval import fft_wind_retrieval
@@ -188,3 +190,103 @@ def test_first_harmonic_amplitude_zonal_wind_dir_var():
         get_radial_velocities_4_test().radial_wind_speed
     )
     assert "zonal_wind" in tmp_ds
+
+
+@pytest.mark.parametrize("n_azimuth", [4, 5, 72])
+def test_first_harmonic_amplitude_same_as_xrft(n_azimuth):
+
+    azimuths = 2.5 + np.arange(n_azimuth) * 360 / n_azimuth
+    radial_velocity = xr.DataArray(
+        np.random.default_rng(0).normal(size=(n_azimuth, 10, 3)),
+        dims=("azimuth", "range", "mean_time"),
+        coords={
+            "azimuth": azimuths,
+            "elevation": 75,
+            "range": np.arange(10),
+            "mean_time": np.arange(3),
+        },
+    )
+
+    complex_amplitudes = xrft.fft(
+        radial_velocity, dim="azimuth", true_amplitude=False
+    )
+    expected = complex_amplitudes.sel(freq_azimuth=1 / 360, method="nearest")
+
+    tmp_amp = fft_wind_retrieval.first_harmonic_amplitude(radial_velocity)
+
+    np.testing.assert_allclose(tmp_amp.values, expected.values)
+    assert tmp_amp.dims == expected.dims
+    assert tmp_amp["azimuth_length"] == n_azimuth
+
+
+def test_first_harmonic_amplitude_uneven_azimuth():
+
+    radial_velocity = xr.DataArray(
+        np.ones(4), dims="azimuth", coords={"azimuth": [0, 90, 180, 300]}
+    )
+
+    with pytest.raises(ValueError):
+        fft_wind_retrieval.first_harmonic_amplitude(radial_velocity)
+
+
+def test_wind_properties_from_amplitude_same_as_components():
+
+    tmp_amp = fft_wind_retrieval.first_harmonic_amplitude(
+        get_radial_velocities_4_test().radial_wind_speed
+    )
+    tmp_ds = fft_wind_retrieval.wind_properties_from_amplitude(tmp_amp)
+
+    xr.testing.assert_allclose(
+        tmp_ds["horizontal_wind_direction"],
+        fft_wind_retrieval.wind_direction(tmp_amp),
+    )
+    xr.testing.assert_allclose(
+        tmp_ds["horizontal_wind_speed"],
+        fft_wind_retrieval.wind_speed(tmp_amp),
+    )
+    xr.testing.assert_allclose(
+        tmp_ds["meridional_wind"],
+        fft_wind_retrieval.meridional_wind(tmp_amp),
+    )
+    xr.testing.assert_allclose(
+        tmp_ds["zonal_wind"], fft_wind_retrieval.zonal_wind(tmp_amp)
+    )
+
+
+def test_get_wind_properties_preallocated_output():
+
+    radial_velocity = get_radial_velocities_4_test().radial_wind_speed
+    out = fft_wind_retrieval.get_wind_properties(radial_velocity * 0)
+    speed = out["horizontal_wind_speed"].values
+
+    tmp_ds = fft_wind_retrieval.get_wind_properties(radial_velocity, out=out)
+
+    assert tmp_ds is out
+    assert tmp_ds["horizontal_wind_speed"].values is speed
+    xr.testing.assert_allclose(
+        tmp_ds, fft_wind_retrieval.get_wind_properties(radial_velocity)
+    )
+
+
+def test_get_wind_properties_preallocated_output_new_coords():
+
+    radial_velocity = get_radial_velocities_4_test().radial_wind_speed
+    out = fft_wind_retrieval.get_wind_properties(radial_velocity)
+
+    # the next scan: other times and another elevation
+    new_velocity = (radial_velocity * 2).assign_coords(
+        time=radial_velocity.time + np.timedelta64(10, "s"), elevation=60
+    )
+    expected = fft_wind_retrieval.get_wind_properties(new_velocity)
+
+    tmp_ds = fft_wind_retrieval.get_wind_properties(new_velocity, out=out)
+
+    assert tmp_ds is out
+    assert tmp_ds["elevation"] == 60
+    np.testing.assert_array_equal(tmp_ds.time, new_velocity.time)
+    xr.testing.assert_allclose(tmp_ds, expected)
+
+    with pytest.raises(ValueError):
+        fft_wind_retrieval.get_wind_properties(
+            radial_velocity.transpose(), out=out
+        )